@@ -1,6 +1,22 @@
+import time
+
+_IMPORT_STARTED = time.perf_counter()
+
+from datetime import datetime
+from typing import Union, get_args, get_origin
+import os
+
 from fastapi import FastAPI
+from fastapi.routing import APIRoute, iter_route_contexts
+from pydantic import BaseModel
+
+from . import routes
 from .routes import router as main_router
-from .metrics import setup_metrics
+from .events import router as events_router
+from .admin import router as admin_router
+from .metrics import setup_metrics, prime_metrics, STARTUP_SECONDS
+from .recording import setup_recording
+from .replication import mutations, setup_replica_mode, ReplicaFollower
 
 app = FastAPI(
     title="Store API",
@@ -9,4 +25,79 @@ app = FastAPI(
 )
 
 app.include_router(main_router)
+app.include_router(events_router)
+app.include_router(admin_router)
 setup_metrics(app)
+
+# Grabación opcional del tráfico en JSONL (ver app.replay)
+if os.getenv("TRAFFIC_RECORD_PATH"):
+    setup_recording(app, os.environ["TRAFFIC_RECORD_PATH"])
+
+# Replicación: el primario publica sus mutaciones; una réplica las sigue y solo atiende lecturas
+replica_follower = None
+if os.getenv("REPLICA_OF"):
+    setup_replica_mode(app)
+    replica_follower = ReplicaFollower(os.environ["REPLICA_OF"]).start()
+elif os.getenv("REPLICATION_LOG"):
+    mutations.open(os.environ["REPLICATION_LOG"])
+
+
+_SAMPLE_VALUES = {str: "warmup", int: 1, float: 1.0, bool: True}
+
+
+def _sample_value(annotation):
+    if get_origin(annotation) is Union:
+        annotation = next(a for a in get_args(annotation) if a is not type(None))
+    if get_origin(annotation) in (list, tuple, set):
+        return []
+    if get_origin(annotation) is dict:
+        return {}
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return _sample_payload(annotation)
+    if annotation is datetime:
+        return datetime.now()
+    return _SAMPLE_VALUES.get(annotation)
+
+
+def _sample_payload(model):
+    return {name: _sample_value(field.annotation) for name, field in model.model_fields.items()}
+
+
+def warm_up_models():
+    """Ejercitar una vez los validadores y serializadores de los modelos de la API"""
+    models = [
+        obj for obj in vars(routes).values()
+        if isinstance(obj, type) and issubclass(obj, BaseModel) and obj is not BaseModel
+    ]
+    for model in models:
+        model.model_validate(_sample_payload(model)).model_dump_json()
+    return models
+
+
+def _static_routes():
+    # Solo app.routes: iter_route_contexts recorre los routers incluidos con su
+    # prefijo efectivo (p.ej. /admin/integrity), cada ruta una vez
+    return [
+        (method, route.path)
+        for route in iter_route_contexts(app.routes)
+        if isinstance(route.original_route, APIRoute) and "{" not in route.path
+        for method in route.methods
+    ]
+
+
+def warm_up():
+    """Fase de arranque: dejar listo todo lo que pagaría el primer request.
+
+    La documentación y el esquema OpenAPI no se generan aquí: FastAPI los
+    construye al primer acceso a /openapi.json o /docs. Tampoco la pila de
+    middlewares: construirla congelaría la app y no se podrían añadir
+    middlewares ni exception handlers después del import.
+    """
+    warm_up_models()
+    prime_metrics(_static_routes())
+
+
+if os.getenv("STORE_API_WARMUP", "1") != "0":
+    warm_up()
+
+STARTUP_SECONDS.set(time.perf_counter() - _IMPORT_STARTED)
@@ -0,0 +1,70 @@
+from fastapi import APIRouter, HTTPException
+from .integrity import check_reference_counts
+from .routes import clients, products, sales
+import tracemalloc
+
+router = APIRouter(prefix="/admin")
+
+_IGNORED_FRAMES = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+)
+
+
+@router.get("/integrity")
+def integrity_check():
+    """Verificar los contadores de referencias contra las ventas"""
+    return check_reference_counts(clients, products, sales)
+
+
+@router.post("/integrity/repair")
+def integrity_repair():
+    """Verificar los contadores y corregir los que no coincidan con las ventas"""
+    return check_reference_counts(clients, products, sales, repair=True)
+
+
+@router.post("/tracemalloc")
+def tracemalloc_start():
+    """Empezar a trazar asignaciones con tracemalloc (tiene coste en todo el proceso)"""
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+    return {"tracing": True}
+
+
+@router.get("/tracemalloc")
+def tracemalloc_snapshot(limit: int = 10, group_by: str = "lineno"):
+    """Top-N de asignaciones de memoria según tracemalloc.
+
+    Solo lee: tracemalloc ve lo asignado desde que empezó a trazar, con
+    PYTHONTRACEMALLOC=1 al arrancar o tras POST /admin/tracemalloc.
+    """
+    if group_by not in ("lineno", "filename", "traceback"):
+        raise HTTPException(status_code=400, detail="group_by must be lineno, filename or traceback")
+    if limit <= 0:
+        raise HTTPException(status_code=400, detail="Limit must be greater than 0")
+    if not tracemalloc.is_tracing():
+        raise HTTPException(status_code=409, detail="tracemalloc is not tracing; start it with POST /admin/tracemalloc")
+
+    snapshot = tracemalloc.take_snapshot().filter_traces(_IGNORED_FRAMES)
+    current, peak = tracemalloc.get_traced_memory()
+    return {
+        "tracing": True,
+        "traced_current_bytes": current,
+        "traced_peak_bytes": peak,
+        "top": [
+            {
+                "location": str(stat.traceback),
+                "size_bytes": stat.size,
+                "count": stat.count,
+            }
+            for stat in snapshot.statistics(group_by)[:limit]
+        ],
+    }
+
+
+@router.delete("/tracemalloc")
+def tracemalloc_stop():
+    """Detener tracemalloc y liberar sus trazas"""
+    tracemalloc.stop()
+    return {"tracing": False}
@@ -0,0 +1,127 @@
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from collections import deque
+from typing import Deque, Iterable, Optional, Set
+from datetime import datetime
+import asyncio
+import json
+import threading
+
+router = APIRouter()
+
+TOPICS = ("stock", "sales")
+SUBSCRIBER_BUFFER = 256  # Eventos pendientes por suscriptor antes de expulsarlo
+KEEPALIVE_SECONDS = 15.0
+
+
+class Subscriber:
+    """Suscriptor SSE con buffer acotado, ligado al event loop que lo consume"""
+
+    def __init__(self, topics: Iterable[str], loop: asyncio.AbstractEventLoop, max_buffer: int = SUBSCRIBER_BUFFER):
+        self.topics = frozenset(topics)
+        self.loop = loop
+        self.max_buffer = max_buffer
+        self.buffer: Deque[bytes] = deque()
+        self.ready = asyncio.Event()
+        self.evicted = False
+
+    def offer(self, payload: bytes):
+        """Encolar un evento ya serializado (se ejecuta en el loop del suscriptor)"""
+        if self.evicted:
+            return
+        if len(self.buffer) >= self.max_buffer:
+            # Consumidor lento: se descarta su buffer y se cierra el stream
+            self.evicted = True
+            self.buffer.clear()
+        else:
+            self.buffer.append(payload)
+        self.ready.set()
+
+
+class EventBroker:
+    """Fan-out de eventos: una serialización por evento, sin importar los suscriptores"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: Set[Subscriber] = set()
+
+    def subscribe(self, topics: Iterable[str], max_buffer: int = SUBSCRIBER_BUFFER) -> Subscriber:
+        subscriber = Subscriber(topics, asyncio.get_running_loop(), max_buffer)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, topic: str, data: dict):
+        """Publicar un evento; seguro de llamar desde los hilos de los handlers"""
+        with self._lock:
+            targets = [s for s in self._subscribers if topic in s.topics and not s.evicted]
+        if not targets:
+            return
+
+        payload = encode_event(topic, data)
+        for subscriber in targets:
+            try:
+                subscriber.loop.call_soon_threadsafe(subscriber.offer, payload)
+            except RuntimeError:
+                # El loop del suscriptor ya se cerró
+                self.unsubscribe(subscriber)
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def encode_event(topic: str, data: dict) -> bytes:
+    """Serializar un evento en formato SSE"""
+    body = json.dumps(data, default=_json_default, separators=(",", ":"))
+    return f"event: {topic}\ndata: {body}\n\n".encode()
+
+
+broker = EventBroker()
+
+
+async def _stream(request: Request, subscriber: Subscriber):
+    try:
+        yield b": connected\n\n"
+        while True:
+            try:
+                await asyncio.wait_for(subscriber.ready.wait(), timeout=KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    break
+                yield b": keepalive\n\n"
+                continue
+
+            subscriber.ready.clear()
+            if subscriber.evicted:
+                yield b"event: evicted\ndata: {}\n\n"
+                break
+            while subscriber.buffer:
+                yield subscriber.buffer.popleft()
+    finally:
+        broker.unsubscribe(subscriber)
+
+
+@router.get("/events")
+async def stream_events(request: Request, topics: Optional[str] = None):
+    """Stream SSE de cambios de stock y nuevas ventas"""
+    requested = [t.strip() for t in topics.split(",") if t.strip()] if topics else list(TOPICS)
+    unknown = [t for t in requested if t not in TOPICS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown topics: {', '.join(unknown)}")
+
+    subscriber = broker.subscribe(requested)
+    return StreamingResponse(
+        _stream(request, subscriber),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
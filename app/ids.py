@@ -0,0 +1,69 @@
+from typing import Dict
+import os
+import random
+import threading
+import time
+
+# IDs ordenados por tiempo con el formato de un UUIDv7:
+# 48 bits de timestamp en ms + 12 bits de secuencia + 62 bits aleatorios por ms.
+# Dentro del mismo milisegundo la secuencia garantiza que los IDs sean
+# estrictamente crecientes, así que ordenarlos equivale a ordenar por creación.
+
+_lock = threading.Lock()
+_random = random.Random(os.urandom(16))
+_last_ms = 0
+_seq = 0
+_prefix = ""
+_suffix = ""
+
+
+def _start_millisecond(ms: int):
+    """Preformatear las partes del ID que no cambian dentro de un milisegundo"""
+    global _last_ms, _seq, _prefix, _suffix
+    _last_ms = ms
+    _seq = 0
+    hi = f"{ms:012x}"
+    lo = f"{0x8000000000000000 | _random.getrandbits(62):016x}"
+    _prefix = f"{hi[:8]}-{hi[8:]}-7"
+    _suffix = f"-{lo[:4]}-{lo[4:]}"
+
+
+def new_id() -> str:
+    """Generar un ID único, monótono y ordenable por fecha de creación"""
+    global _seq
+
+    now_ms = time.time_ns() // 1_000_000
+    with _lock:
+        if now_ms > _last_ms:
+            _start_millisecond(now_ms)
+        elif _seq < 0xFFF:
+            # Mismo milisegundo (o reloj hacia atrás): avanzar la secuencia
+            _seq += 1
+        else:
+            _start_millisecond(_last_ms + 1)
+        return f"{_prefix}{_seq:03x}{_suffix}"
+
+
+class IdInterner:
+    """Tabla de IDs canónicos: cada string de ID existe una sola vez en memoria"""
+
+    def __init__(self):
+        self._table: Dict[str, str] = {}
+
+    def intern(self, entity_id: str) -> str:
+        # dict.setdefault es atómico bajo el GIL, no hace falta lock
+        return self._table.setdefault(entity_id, entity_id)
+
+    def discard(self, entity_id: str):
+        self._table.pop(entity_id, None)
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+
+interner = IdInterner()
+
+
+def intern_id(entity_id: str) -> str:
+    """Devolver la instancia canónica de un ID"""
+    return interner.intern(entity_id)
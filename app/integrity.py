@@ -0,0 +1,37 @@
+from collections import Counter
+from typing import Dict
+
+
+def _diff(store, expected: Counter) -> Dict[str, dict]:
+    counted = store.ref_counts()
+    return {
+        key: {"expected": expected.get(key, 0), "counted": counted.get(key, 0)}
+        for key in set(expected) | set(counted)
+        if expected.get(key, 0) != counted.get(key, 0)
+    }
+
+
+def check_reference_counts(clients, products, sales, repair: bool = False) -> dict:
+    """Comparar los contadores de referencias con un recuento sobre las ventas.
+
+    Bloquea todos los shards (clients antes que products) mientras recorre las
+    ventas, así que ninguna venta puede crearse a mitad del chequeo. Con
+    repair=True los contadores incorrectos se reemplazan por el recuento real.
+    """
+    with clients.locked_all(), products.locked_all():
+        by_client = Counter(sale["client_id"] for sale in sales)
+        by_product = Counter(sale["product_id"] for sale in sales)
+        mismatches = {
+            "clients": _diff(clients, by_client),
+            "products": _diff(products, by_product),
+        }
+        if repair:
+            for store, name in ((clients, "clients"), (products, "products")):
+                for key, counts in mismatches[name].items():
+                    store.add_ref(key, counts["expected"] - counts["counted"])
+
+    return {
+        "consistent": not (mismatches["clients"] or mismatches["products"]),
+        "sales_scanned": len(sales),
+        "mismatches": mismatches,
+    }
@@ -0,0 +1,66 @@
+from itertools import islice
+import sys
+
+SAMPLE_SIZE = 64
+
+
+def deep_sizeof(obj, seen=None, depth: int = 4) -> int:
+    """Tamaño aproximado de un objeto y de lo que contiene (dicts, listas, objetos con __slots__)"""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if depth == 0:
+        return size
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            size += deep_sizeof(key, seen, depth - 1) + deep_sizeof(value, seen, depth - 1)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        for item in obj:
+            size += deep_sizeof(item, seen, depth - 1)
+    elif hasattr(obj, "__slots__"):
+        for slot in obj.__slots__:
+            if hasattr(obj, slot):
+                size += deep_sizeof(getattr(obj, slot), seen, depth - 1)
+    return size
+
+
+def _sample_sharded(store, sample_size: int) -> list:
+    # Las primeras entradas de cada shard: islice con paso recorrería casi
+    # todo el shard con su lock tomado, bloqueando a los escritores
+    per_shard = max(1, sample_size // len(store.shards))
+    sample = []
+    for shard in store.shards:
+        with shard.lock:
+            sample.extend(islice(shard.data.values(), per_shard))
+    return sample
+
+
+def estimate_store_bytes(store, sample_size: int = SAMPLE_SIZE) -> int:
+    """Estimar los bytes de un store a partir de una muestra de sus entradas.
+
+    Acepta un ShardedStore, un dict o una lista. Se mide el contenedor más una
+    muestra de entradas (las primeras de cada shard o dict, repartidas en una
+    lista) y se extrapola por el número de entradas, sin recorrer el store. Los objetos compartidos (p.ej. IDs internados)
+    solo se cuentan una vez dentro de la muestra.
+    """
+    total = len(store)
+    if hasattr(store, "shards"):
+        container = sum(sys.getsizeof(shard.data) + sys.getsizeof(shard.refs) for shard in store.shards)
+        sample = _sample_sharded(store, sample_size) if total else []
+    elif isinstance(store, dict):
+        container = sys.getsizeof(store)
+        sample = list(islice(store.values(), sample_size))
+    else:
+        # Un slice con paso sobre una lista solo toca los elementos elegidos
+        container = sys.getsizeof(store)
+        step = max(1, total // sample_size)
+        sample = store[:sample_size * step:step]
+
+    if not sample:
+        return container
+    seen = set()
+    sampled = sum(deep_sizeof(entry, seen) for entry in sample)
+    return container + int(sampled / len(sample) * total)
@@ -1,8 +1,28 @@
 from fastapi import Request
 from fastapi.responses import Response
-from prometheus_client import Counter, Histogram, Gauge, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client import Counter, Histogram, Gauge, generate_latest, CONTENT_TYPE_LATEST, REGISTRY
+from .quantiles import LatencySketch
+from .memory import estimate_store_bytes
+import json
+import os
+import re
 import time
 
+# Buckets de latencia por grupo de endpoints (primer segmento del path).
+# Los endpoints en memoria responden en < 5ms, así que el layout por defecto
+# es fino en ese rango. Se pueden definir grupos propios con la variable de
+# entorno LATENCY_BUCKETS, p.ej. '{"sales": [0.001, 0.002, 0.005, 0.01]}'.
+LATENCY_BUCKETS = {
+    "default": (
+        0.0001, 0.00025, 0.0005, 0.00075, 0.001, 0.0015, 0.002, 0.003, 0.004, 0.005,
+        0.0075, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+    ),
+}
+LATENCY_BUCKETS.update({
+    group: tuple(sorted(buckets))
+    for group, buckets in json.loads(os.getenv("LATENCY_BUCKETS", "{}")).items()
+})
+
 # Métricas principales
 REQUEST_COUNT = Counter(
     "http_requests_total", 
@@ -13,9 +33,25 @@ REQUEST_COUNT = Counter(
 REQUEST_LATENCY = Histogram(
     "http_request_duration_seconds", 
     "Request latency in seconds", 
-    ["endpoint"]
+    ["endpoint"],
+    buckets=LATENCY_BUCKETS["default"]
 )
 
+# Un histograma por grupo con layout propio; el resto usa REQUEST_LATENCY
+GROUP_LATENCY = {
+    group: Histogram(
+        f"http_request_duration_{re.sub(r'[^a-zA-Z0-9_]', '_', group)}_seconds",
+        f"Request latency in seconds for /{group} endpoints",
+        ["endpoint"],
+        buckets=buckets
+    )
+    for group, buckets in LATENCY_BUCKETS.items()
+    if group != "default"
+}
+
+# Cuantiles en proceso por grupo, expuestos en /metrics/latency
+LATENCY_SKETCHES = {}
+
 REQUEST_ERRORS = Counter(
     "http_errors_total",
     "Total HTTP errors",
@@ -28,6 +64,24 @@ ACTIVE_PRODUCTS = Gauge("active_products_total", "Total number of active product
 TOTAL_SALES = Gauge("sales_total", "Total number of sales")
 REVENUE_TOTAL = Gauge("revenue_total", "Total revenue from sales")
 
+# Métricas de memoria. El tamaño se estima por muestreo y se recalcula como
+# mucho cada MEMORY_SAMPLE_INTERVAL segundos, no en cada scrape.
+MEMORY_SAMPLE_INTERVAL = float(os.getenv("MEMORY_SAMPLE_INTERVAL", "30"))
+STORE_ENTRIES = Gauge("store_entries", "Number of entries per in-memory store", ["store"])
+STORE_BYTES = Gauge("store_estimated_bytes", "Estimated memory per in-memory store (sampled)", ["store"])
+METRIC_SERIES = Gauge("metric_label_series", "Number of label series per metric", ["metric"])
+_last_memory_sample = 0.0
+
+# Métricas de replicación (solo en réplicas)
+REPLICATION_LAG = Gauge("replication_lag_seconds", "Delay between a mutation on the primary and its apply on this replica")
+REPLICATION_APPLIED_SEQ = Gauge("replication_applied_seq", "Sequence number of the last applied mutation")
+REPLICATION_APPLIED = Counter("replication_mutations_applied_total", "Mutations applied from the primary stream")
+REPLICATION_ERRORS = Counter("replication_errors_total", "Stream lines that could not be read or applied")
+REPLICATION_HEARTBEAT = Gauge("replication_follower_heartbeat_seconds", "Unix time of the last replica follower poll")
+
+# Métricas de arranque
+STARTUP_SECONDS = Gauge("app_startup_seconds", "Time from package import to ready to serve")
+
 def update_business_metrics():
     """Actualizar métricas de negocio"""
     from .routes import clients, products, sales
@@ -39,17 +93,83 @@ def update_business_metrics():
     total_revenue = sum(sale.get("total_amount", 0) for sale in sales)
     REVENUE_TOTAL.set(total_revenue)
 
+def _in_memory_stores():
+    from .routes import clients, products, sales, orders, price_history
+    return {
+        "clients": clients,
+        "products": products,
+        "sales": sales,
+        "orders": orders,
+        "price_history": price_history,
+    }
+
+def _count_label_series():
+    series = {}
+    for family in REGISTRY.collect():
+        label_sets = {
+            tuple(sorted((k, v) for k, v in sample.labels.items() if k not in ("le", "quantile")))
+            for sample in family.samples
+        }
+        series[family.name] = len(label_sets)
+    return series
+
+def update_memory_metrics(force=False):
+    """Actualizar entradas, bytes estimados y series por métrica"""
+    global _last_memory_sample
+    stores = _in_memory_stores()
+    for name, store in stores.items():
+        STORE_ENTRIES.labels(store=name).set(len(store))
+
+    now = time.monotonic()
+    if not force and _last_memory_sample and now - _last_memory_sample < MEMORY_SAMPLE_INTERVAL:
+        return
+    _last_memory_sample = now
+    for name, store in stores.items():
+        STORE_BYTES.labels(store=name).set(estimate_store_bytes(store))
+    for metric, count in _count_label_series().items():
+        METRIC_SERIES.labels(metric=metric).set(count)
+
+def endpoint_group(path):
+    """Grupo de un endpoint: primer segmento del path"""
+    return path.lstrip("/").split("/", 1)[0] or "root"
+
+def route_group(request):
+    """Grupo de la ruta que atendió el request; "other" si no coincidió ninguna.
+
+    Se agrupa por la plantilla de la ruta y no por el path pedido, para que
+    los paths inexistentes (404) no creen grupos nuevos.
+    """
+    route = request.scope.get("route")
+    return endpoint_group(route.path) if route is not None else "other"
+
+def observe_latency(request, seconds):
+    """Registrar la latencia de un request en su histograma y en su sketch"""
+    group = route_group(request)
+    GROUP_LATENCY.get(group, REQUEST_LATENCY).labels(endpoint=request.url.path).observe(seconds)
+    sketch = LATENCY_SKETCHES.get(group)
+    if sketch is None:
+        sketch = LATENCY_SKETCHES.setdefault(group, LatencySketch())
+    sketch.add(seconds)
+
+def prime_metrics(routes):
+    """Crear por adelantado los hijos de las métricas para las rutas estáticas"""
+    for method, path in routes:
+        GROUP_LATENCY.get(endpoint_group(path), REQUEST_LATENCY).labels(endpoint=path)
+        REQUEST_COUNT.labels(method=method, endpoint=path, status_code=200)
+    update_business_metrics()
+    generate_latest()
+
 def setup_metrics(app):
     @app.middleware("http")
     async def metrics_middleware(request: Request, call_next):
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         try:
             response = await call_next(request)
-            process_time = time.time() - start_time
+            process_time = time.perf_counter() - start_time
             
             # Registrar métricas de request
-            REQUEST_LATENCY.labels(endpoint=request.url.path).observe(process_time)
+            observe_latency(request, process_time)
             REQUEST_COUNT.labels(
                 method=request.method, 
                 endpoint=request.url.path,
@@ -72,8 +192,8 @@ def setup_metrics(app):
             return response
             
         except Exception as e:
-            process_time = time.time() - start_time
-            REQUEST_LATENCY.labels(endpoint=request.url.path).observe(process_time)
+            process_time = time.perf_counter() - start_time
+            observe_latency(request, process_time)
             REQUEST_COUNT.labels(
                 method=request.method, 
                 endpoint=request.url.path,
@@ -90,8 +210,14 @@ def setup_metrics(app):
     def metrics():
         """Endpoint para exponer métricas de Prometheus"""
         update_business_metrics()  # Actualizar antes de exponer
+        update_memory_metrics()
         return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
     
+    @app.get("/metrics/latency")
+    def latency_quantiles():
+        """Cuantiles de latencia (segundos) por grupo de endpoints, calculados en proceso"""
+        return {group: sketch.summary() for group, sketch in sorted(LATENCY_SKETCHES.items())}
+    
     @app.get("/health")
     def health_check():
         """Endpoint de health check"""
@@ -0,0 +1,66 @@
+from bisect import bisect_right
+from datetime import datetime
+from typing import List, Optional
+
+
+class PriceHistory:
+    """Historial de precios append-only de un producto.
+
+    Cada cambio de precio crea una versión nueva (0, 1, 2...). Las marcas de
+    tiempo son crecientes, así que "precio en el instante T" es una búsqueda
+    binaria. Junto a cada versión se acumulan las unidades vendidas y el
+    revenue, que sirven de índice para consultas por precio sin recorrer ventas.
+    """
+
+    __slots__ = ("valid_from", "prices", "quantity_sold", "revenue")
+
+    def __init__(self, price: float, at: datetime):
+        self.valid_from: List[datetime] = []
+        self.prices: List[float] = []
+        self.quantity_sold: List[int] = []
+        self.revenue: List[float] = []
+        self.append(price, at)
+
+    @property
+    def current_version(self) -> int:
+        return len(self.prices) - 1
+
+    @property
+    def current_price(self) -> float:
+        return self.prices[-1]
+
+    def append(self, price: float, at: datetime) -> int:
+        """Registrar un precio nuevo; devuelve su versión"""
+        if self.valid_from and at < self.valid_from[-1]:
+            # Reloj hacia atrás: mantener el orden para la búsqueda binaria
+            at = self.valid_from[-1]
+        self.valid_from.append(at)
+        self.prices.append(price)
+        self.quantity_sold.append(0)
+        self.revenue.append(0.0)
+        return self.current_version
+
+    def version_at(self, at: datetime) -> Optional[int]:
+        """Versión vigente en un instante, en O(log n); None si es anterior al producto"""
+        index = bisect_right(self.valid_from, at) - 1
+        return index if index >= 0 else None
+
+    def price_at(self, at: datetime) -> Optional[float]:
+        version = self.version_at(at)
+        return self.prices[version] if version is not None else None
+
+    def record_sale(self, version: int, quantity: int, amount: float):
+        self.quantity_sold[version] += quantity
+        self.revenue[version] += amount
+
+    def versions(self) -> List[dict]:
+        return [
+            {
+                "version": version,
+                "price": self.prices[version],
+                "valid_from": self.valid_from[version],
+                "quantity_sold": self.quantity_sold[version],
+                "revenue": self.revenue[version],
+            }
+            for version in range(len(self.prices))
+        ]
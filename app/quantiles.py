@@ -0,0 +1,73 @@
+from typing import Dict, Iterable, Optional
+import math
+import threading
+
+# Estimador de cuantiles en streaming con error relativo acotado (estilo
+# DDSketch / HDR): cada valor cae en un bucket logarítmico de ancho gamma, así
+# que cualquier cuantil se estima con error relativo <= relative_accuracy usando
+# memoria proporcional a log(max/min), no al número de observaciones.
+
+DEFAULT_QUANTILES = (0.5, 0.99, 0.999)
+
+
+class LatencySketch:
+    """Sketch de cuantiles con error relativo acotado y memoria constante"""
+
+    def __init__(self, relative_accuracy: float = 0.01, min_value: float = 1e-6):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        self.relative_accuracy = relative_accuracy
+        self.min_value = min_value
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._lock = threading.Lock()
+        self._buckets: Dict[int, int] = {}
+        self._zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def add(self, value: float):
+        """Registrar una observación"""
+        with self._lock:
+            self.count += 1
+            self.sum += value
+            if value > self.max:
+                self.max = value
+            if value <= self.min_value:
+                self._zero_count += 1
+                return
+            key = math.ceil(math.log(value) / self._log_gamma)
+            self._buckets[key] = self._buckets.get(key, 0) + 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimar el cuantil q (0 <= q <= 1)"""
+        if not 0 <= q <= 1:
+            raise ValueError("quantile must be between 0 and 1")
+        with self._lock:
+            if self.count == 0:
+                return None
+            rank = q * (self.count - 1)
+            seen = self._zero_count
+            if rank < seen:
+                return 0.0
+            for key in sorted(self._buckets):
+                seen += self._buckets[key]
+                if seen > rank:
+                    # Punto medio (en error relativo) del bucket
+                    return min(2 * self._gamma ** key / (self._gamma + 1), self.max)
+            return self.max
+
+    def summary(self, quantiles: Iterable[float] = DEFAULT_QUANTILES) -> dict:
+        result = {"count": self.count, "sum": self.sum, "max": self.max}
+        for q in quantiles:
+            result[f"p{format(q * 100, 'g').replace('.', '')}"] = self.quantile(q)
+        return result
+
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
+            self._zero_count = 0
+            self.count = 0
+            self.sum = 0.0
+            self.max = 0.0
@@ -0,0 +1,110 @@
+from fastapi import Request
+from fastapi.responses import Response
+from datetime import datetime
+import json
+import queue
+import threading
+import time
+
+# Formato JSONL de tráfico (una línea por request), el mismo que lee app.replay:
+# {"ts": 1718000000.123, "method": "POST", "path": "/clients", "query": "",
+#  "body": {...}, "status": 200, "duration": 0.0012,
+#  "response_ids": {"client_id": "..."}}
+# response_ids guarda los *_id devueltos por los POST para que el replay pueda
+# remapear los IDs grabados a los que genere el servidor de destino.
+# Las respuestas text/event-stream (/events) se graban con "stream": true:
+# no terminan nunca, así que el replay las salta.
+
+_STOP = object()
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+class JsonlWriter:
+    """Escribe entradas en un JSONL desde un hilo propio, sin bloquear a quien graba"""
+
+    def __init__(self, path: str, name: str = "jsonl-writer"):
+        self.path = path
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def record(self, entry: dict):
+        self._queue.put(entry)
+
+    def close(self):
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def _run(self):
+        with open(self.path, "a", encoding="utf-8") as output:
+            while True:
+                entry = self._queue.get()
+                if entry is _STOP:
+                    break
+                output.write(json.dumps(entry, default=_json_default, separators=(",", ":")) + "\n")
+                if self._queue.empty():
+                    output.flush()
+
+
+def _decode_body(body: bytes):
+    if not body:
+        return None
+    try:
+        return json.loads(body)
+    except ValueError:
+        return body.decode("utf-8", errors="replace")
+
+
+def _response_ids(body: bytes) -> dict:
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    return {key: value for key, value in data.items() if key.endswith("_id") and isinstance(value, str)}
+
+
+def setup_recording(app, path: str) -> JsonlWriter:
+    """Registrar un middleware que graba cada request en formato JSONL"""
+    recorder = JsonlWriter(path, name="traffic-recorder")
+
+    @app.middleware("http")
+    async def recording_middleware(request: Request, call_next):
+        ts = time.time()
+        start_time = time.perf_counter()
+        raw_body = await request.body()
+        response = await call_next(request)
+        duration = time.perf_counter() - start_time
+
+        entry = {
+            "ts": ts,
+            "method": request.method,
+            "path": request.url.path,
+            "query": request.url.query,
+            "body": _decode_body(raw_body),
+            "status": response.status_code,
+            "duration": duration,
+        }
+
+        content_type = response.headers.get("content-type", "")
+        if content_type.startswith("text/event-stream"):
+            entry["stream"] = True
+        elif request.method == "POST" and content_type.startswith("application/json"):
+            # Leer la respuesta para conservar los IDs creados y reconstruirla
+            content = b"".join([chunk async for chunk in response.body_iterator])
+            entry["response_ids"] = _response_ids(content)
+            rebuilt = Response(content=content, status_code=response.status_code)
+            # Cabeceras crudas: un dict colapsaría las repetidas (p.ej. varios Set-Cookie)
+            rebuilt.raw_headers = response.raw_headers
+            response = rebuilt
+
+        recorder.record(entry)
+        return response
+
+    return recorder
@@ -0,0 +1,283 @@
+"""Replay de tráfico grabado en JSONL contra la API.
+
+Lee un log en el formato de app.recording y lo reproduce contra la app ASGI
+en proceso o contra un servidor en marcha, con concurrencia y aceleración
+configurables. Informa throughput, percentiles de latencia y tasa de error
+por ruta.
+
+Uso:
+    python -m app.replay traffic.jsonl                        # en proceso
+    python -m app.replay traffic.jsonl --target http://localhost:8000
+    python -m app.replay traffic.jsonl --concurrency 32 --speed 10
+
+--speed 0 (por defecto) envía lo más rápido posible respetando el orden y las
+dependencias; --speed N reproduce los tiempos originales N veces más rápido.
+Las entradas marcadas como stream (SSE de /events) se saltan, y cada request
+tiene un plazo máximo (--request-timeout) para que un stream sin marcar de un
+log antiguo no bloquee el replay.
+"""
+from typing import Dict, List, Optional, Tuple
+import argparse
+import asyncio
+import json
+import re
+import sys
+import time
+
+import httpx
+
+from .quantiles import LatencySketch
+
+REQUEST_TIMEOUT = 30.0
+_UUID_SEGMENT = re.compile(r"^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$")
+
+
+def load_entries(path: str) -> Tuple[List[dict], int]:
+    """Leer un log JSONL; devuelve las entradas válidas y cuántas líneas se saltaron"""
+    entries, skipped = [], 0
+    with open(path, encoding="utf-8") as source:
+        for line in source:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                skipped += 1
+                continue
+            if not isinstance(entry, dict) or "method" not in entry or "path" not in entry:
+                skipped += 1
+                continue
+            entries.append(entry)
+    return entries, skipped
+
+
+def route_key(method: str, path: str, known_ids) -> str:
+    """Normalizar un path a su plantilla de ruta (IDs -> {id})"""
+    segments = [
+        "{id}" if segment in known_ids or _UUID_SEGMENT.match(segment) else segment
+        for segment in path.split("/")
+    ]
+    return f"{method} {'/'.join(segments)}"
+
+
+def _referenced_ids(value, known_ids, found):
+    if isinstance(value, str):
+        if value in known_ids:
+            found.add(value)
+        else:
+            for segment in value.split("/"):
+                if segment in known_ids:
+                    found.add(segment)
+    elif isinstance(value, dict):
+        for item in value.values():
+            _referenced_ids(item, known_ids, found)
+    elif isinstance(value, list):
+        for item in value:
+            _referenced_ids(item, known_ids, found)
+    return found
+
+
+def _remap(value, id_map):
+    if isinstance(value, str):
+        if value in id_map:
+            return id_map[value]
+        if "/" in value:
+            return "/".join(id_map.get(segment, segment) for segment in value.split("/"))
+        return value
+    if isinstance(value, dict):
+        return {key: _remap(item, id_map) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_remap(item, id_map) for item in value]
+    return value
+
+
+class RouteStats:
+    """Contadores y latencias de una ruta"""
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.latency = LatencySketch()
+
+    def add(self, seconds: float, error: bool):
+        self.count += 1
+        self.errors += error
+        self.latency.add(seconds)
+
+
+class Replayer:
+    """Reproduce una lista de entradas contra un cliente httpx asíncrono"""
+
+    def __init__(self, entries: List[dict], concurrency: int = 8, speed: float = 0.0,
+                 request_timeout: float = REQUEST_TIMEOUT):
+        self.entries = entries
+        self.concurrency = max(1, concurrency)
+        self.speed = speed
+        self.request_timeout = request_timeout
+        self.skipped_streams = 0
+        # recorded_id -> índice de la entrada que lo creó
+        self.creators: Dict[str, int] = {
+            recorded: index
+            for index, entry in enumerate(entries)
+            for recorded in (entry.get("response_ids") or {}).values()
+        }
+        self.id_map: Dict[str, str] = {}
+        self.stats: Dict[str, RouteStats] = {}
+
+    async def _send(self, client: httpx.AsyncClient, index: int, done: List[asyncio.Event],
+                    semaphore: asyncio.Semaphore, pending: asyncio.Semaphore):
+        try:
+            await self._send_entry(client, index, done, semaphore)
+        finally:
+            done[index].set()
+            pending.release()
+
+    async def _send_entry(self, client: httpx.AsyncClient, index: int, done: List[asyncio.Event],
+                          semaphore: asyncio.Semaphore):
+        entry = self.entries[index]
+        if entry.get("stream"):
+            self.skipped_streams += 1
+            return
+        # Esperar a que terminen los requests que crearon los IDs referenciados
+        needed = _referenced_ids([entry["path"], entry.get("body")], self.creators, set())
+        for recorded in needed:
+            creator = self.creators[recorded]
+            if creator != index:
+                await done[creator].wait()
+
+        path = _remap(entry["path"], self.id_map)
+        query = entry.get("query") or ""
+        body = _remap(entry.get("body"), self.id_map)
+        key = route_key(entry["method"], entry["path"], self.creators)
+
+        async with semaphore:
+            start = time.perf_counter()
+            error = False
+            try:
+                # Plazo total, no de lectura: un stream con keepalives nunca agota el de httpx
+                response = await asyncio.wait_for(client.request(
+                    entry["method"], f"{path}?{query}" if query else path,
+                    json=body if body is not None else None,
+                ), timeout=self.request_timeout)
+                error = response.status_code >= 400
+                recorded_ids = entry.get("response_ids") or {}
+                if recorded_ids and not error:
+                    data = response.json()
+                    for field, recorded in recorded_ids.items():
+                        if isinstance(data.get(field), str):
+                            self.id_map[recorded] = data[field]
+            except (httpx.HTTPError, ValueError, asyncio.TimeoutError):
+                error = True
+            elapsed = time.perf_counter() - start
+
+        self.stats.setdefault(key, RouteStats()).add(elapsed, error)
+
+    async def run(self, client: httpx.AsyncClient) -> float:
+        """Reproducir todas las entradas; devuelve la duración total en segundos"""
+        done = [asyncio.Event() for _ in self.entries]
+        semaphore = asyncio.Semaphore(self.concurrency)
+        # Limita las tareas creadas por adelantado. Las dependencias siempre
+        # apuntan a entradas anteriores, así que la más antigua puede avanzar.
+        pending = asyncio.Semaphore(self.concurrency * 4)
+        tasks = []
+        first_ts = self.entries[0].get("ts", 0) if self.entries else 0
+        start = time.perf_counter()
+
+        for index, entry in enumerate(self.entries):
+            if self.speed > 0:
+                delay = (entry.get("ts", first_ts) - first_ts) / self.speed - (time.perf_counter() - start)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            await pending.acquire()
+            tasks.append(asyncio.create_task(self._send(client, index, done, semaphore, pending)))
+
+        await asyncio.gather(*tasks)
+        return time.perf_counter() - start
+
+    def report(self, elapsed: float) -> dict:
+        routes = {}
+        for key, stats in sorted(self.stats.items()):
+            routes[key] = {
+                "count": stats.count,
+                "errors": stats.errors,
+                "error_rate": stats.errors / stats.count,
+                "rps": stats.count / elapsed if elapsed else 0.0,
+                "p50": stats.latency.quantile(0.5),
+                "p95": stats.latency.quantile(0.95),
+                "p99": stats.latency.quantile(0.99),
+            }
+        total = sum(s.count for s in self.stats.values())
+        errors = sum(s.errors for s in self.stats.values())
+        return {
+            "requests": total,
+            "errors": errors,
+            "error_rate": errors / total if total else 0.0,
+            "elapsed": elapsed,
+            "rps": total / elapsed if elapsed else 0.0,
+            "skipped_streams": self.skipped_streams,
+            "routes": routes,
+        }
+
+
+async def replay(entries: List[dict], target: Optional[str] = None, app=None,
+                 concurrency: int = 8, speed: float = 0.0, request_timeout: float = REQUEST_TIMEOUT) -> dict:
+    """Reproducir entradas en proceso (app ASGI) o contra un servidor (target URL)"""
+    if target:
+        client = httpx.AsyncClient(base_url=target, timeout=30.0)
+    else:
+        if app is None:
+            from . import app as store_app
+            app = store_app
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://replay")
+
+    replayer = Replayer(entries, concurrency=concurrency, speed=speed, request_timeout=request_timeout)
+    async with client:
+        elapsed = await replayer.run(client)
+    return replayer.report(elapsed)
+
+
+def format_report(report: dict) -> str:
+    lines = [
+        f"{report['requests']} requests en {report['elapsed']:.2f}s "
+        f"({report['rps']:.1f} req/s), errores {report['error_rate'] * 100:.1f}%",
+        "",
+        f"{'ruta':<34} {'n':>6} {'req/s':>8} {'err%':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}",
+    ]
+    for key, route in report["routes"].items():
+        lines.append(
+            f"{key:<34} {route['count']:>6} {route['rps']:>8.1f} {route['error_rate'] * 100:>6.1f} "
+            f"{route['p50'] * 1000:>8.2f} {route['p95'] * 1000:>8.2f} {route['p99'] * 1000:>8.2f}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay de tráfico JSONL contra la Store API")
+    parser.add_argument("log", help="Archivo JSONL grabado (ver app.recording)")
+    parser.add_argument("--target", help="URL de un servidor en marcha; por defecto, la app en proceso")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--speed", type=float, default=0.0,
+                        help="Factor de aceleración sobre los tiempos grabados (0 = sin esperas)")
+    parser.add_argument("--request-timeout", type=float, default=REQUEST_TIMEOUT,
+                        help="Plazo máximo por request en segundos")
+    parser.add_argument("--json", action="store_true", help="Imprimir el reporte en JSON")
+    args = parser.parse_args(argv)
+
+    entries, skipped = load_entries(args.log)
+    if skipped:
+        print(f"Se saltaron {skipped} líneas que no son requests HTTP", file=sys.stderr)
+    if not entries:
+        print("No hay requests para reproducir", file=sys.stderr)
+        return 1
+
+    report = asyncio.run(replay(entries, target=args.target, concurrency=args.concurrency, speed=args.speed,
+                                request_timeout=args.request_timeout))
+    if report["skipped_streams"]:
+        print(f"Se saltaron {report['skipped_streams']} streams SSE", file=sys.stderr)
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,307 @@
+"""Replicación primario -> réplicas de solo lectura mediante un stream de mutaciones.
+
+El primario (REPLICATION_LOG=/ruta/mutations.jsonl) escribe cada cambio de
+estado como una línea JSONL. Las réplicas (REPLICA_OF=/ruta/mutations.jsonl)
+siguen ese archivo como un `tail -f`, aplican las mutaciones a sus propios
+stores en memoria y solo atienden requests de lectura.
+
+Operaciones del stream:
+    reset                          el primario arrancó con estado vacío
+    put     store, data            alta o reemplazo completo de un cliente/producto
+    delete  store, id              baja de un cliente/producto
+    price   product_id, price, at  nueva versión de precio
+    sale    data, stock            venta nueva y stock resultante del producto
+    order   data, stock            pedido con sus líneas y stock resultante por producto
+"""
+from datetime import datetime
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from typing import Optional
+import json
+import logging
+import os
+import threading
+import time
+
+from .events import broker
+from .ids import intern_id, interner
+from .metrics import (
+    REPLICATION_LAG, REPLICATION_APPLIED_SEQ, REPLICATION_APPLIED, REPLICATION_ERRORS, REPLICATION_HEARTBEAT
+)
+from .pricing import PriceHistory
+from .recording import JsonlWriter
+
+READ_ONLY_METHODS = ("GET", "HEAD", "OPTIONS")
+POLL_INTERVAL = 0.05
+
+logger = logging.getLogger(__name__)
+
+
+class MutationLog:
+    """Stream de mutaciones del primario; no hace nada si no está abierto"""
+
+    def __init__(self):
+        self._writer: Optional[JsonlWriter] = None
+        self._lock = threading.Lock()
+        self._seq = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._writer is not None
+
+    def open(self, path: str):
+        """Empezar un stream nuevo: el primario arranca siempre con estado vacío"""
+        open(path, "w").close()
+        self._writer = JsonlWriter(path, name="mutation-log")
+        self._seq = 0
+        self.emit("reset")
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def emit(self, op: str, **fields):
+        """Registrar una mutación; llamar con los locks de las entidades tomados"""
+        if self._writer is None:
+            return
+        if "data" in fields:
+            # Copia del registro: el hilo escritor serializa más tarde y la
+            # entidad puede haber cambiado para entonces
+            fields["data"] = dict(fields["data"])
+        with self._lock:
+            self._seq += 1
+            self._writer.record({"seq": self._seq, "ts": time.time(), "op": op, **fields})
+
+
+mutations = MutationLog()
+
+
+def _parse_record(record: dict, intern_keys=("client_id", "product_id")) -> dict:
+    """Restaurar fechas e IDs internados de un registro leído del stream.
+
+    Como en el primario, solo se internan los IDs de clientes y productos: los
+    de ventas y pedidos son únicos y nunca se liberarían de la tabla.
+    """
+    if isinstance(record.get("created_at"), str):
+        record["created_at"] = datetime.fromisoformat(record["created_at"])
+    for key in intern_keys:
+        if isinstance(record.get(key), str):
+            record[key] = intern_id(record[key])
+    return record
+
+
+def _apply_sale(target, sale: dict):
+    client_id, product_id = sale["client_id"], sale["product_id"]
+    target.sales.append(sale)
+    target.clients.add_ref(client_id)
+    target.products.add_ref(product_id)
+    history = target.price_history.get(product_id)
+    if history is not None and sale.get("price_version") is not None:
+        history.record_sale(sale["price_version"], sale["quantity"], sale["total_amount"])
+
+
+def _set_stock(target, product_id: str, stock: int):
+    product = target.products.get(product_id)
+    if product is not None:
+        product["stock"] = stock
+
+
+def apply_mutation(entry: dict, target):
+    """Aplicar una mutación del stream a los stores de target (por defecto, app.routes)"""
+    op = entry["op"]
+
+    if op == "reset":
+        for store in (target.clients, target.products, target.orders, target.price_history):
+            store.clear()
+        target.sales.clear()
+
+    elif op == "put":
+        data = _parse_record(entry["data"], intern_keys=("id",))
+        if entry["store"] == "products":
+            with target.products.locked(data["id"]):
+                if data["id"] not in target.price_history:
+                    target.price_history[data["id"]] = PriceHistory(data["price"], data["created_at"])
+                previous = target.products.get(data["id"])
+                target.products[data["id"]] = data
+                # Cambio de stock vía PUT /products: el primario también lo publica
+                if previous is not None and previous["stock"] != data["stock"]:
+                    broker.publish("stock", {"product_id": data["id"], "stock": data["stock"]})
+        else:
+            getattr(target, entry["store"])[data["id"]] = data
+
+    elif op == "delete":
+        getattr(target, entry["store"]).pop(entry["id"], None)
+        if entry["store"] == "products":
+            target.price_history.pop(entry["id"], None)
+        interner.discard(entry["id"])
+
+    elif op == "price":
+        with target.products.locked(entry["product_id"]):
+            history = target.price_history.get(entry["product_id"])
+            if history is not None:
+                history.append(entry["price"], datetime.fromisoformat(entry["at"]))
+
+    elif op == "sale":
+        sale = _parse_record(entry["data"])
+        with target.clients.locked(sale["client_id"]), target.products.locked(sale["product_id"]):
+            _apply_sale(target, sale)
+            _set_stock(target, sale["product_id"], entry["stock"])
+        broker.publish("sales", sale)
+        broker.publish("stock", {"product_id": sale["product_id"], "stock": entry["stock"]})
+
+    elif op == "order":
+        order = _parse_record(entry["data"])
+        lines = [_parse_record(line) for line in order["lines"]]
+        with target.clients.locked(order["client_id"]), target.products.locked(*entry["stock"]):
+            for line in lines:
+                _apply_sale(target, line)
+            for product_id, stock in entry["stock"].items():
+                _set_stock(target, product_id, stock)
+            target.orders[order["id"]] = order
+        for line in lines:
+            broker.publish("sales", line)
+        for product_id, stock in entry["stock"].items():
+            broker.publish("stock", {"product_id": product_id, "stock": stock})
+
+    else:
+        raise ValueError(f"Unknown mutation op: {op}")
+
+
+class ReplicaFollower:
+    """Sigue el archivo de mutaciones del primario y lo aplica a los stores locales.
+
+    Cada línea debe traer seq = último aplicado + 1. Un reset, un seq 1 o un
+    salto de seq fuera del principio del archivo indican que el primario
+    reinició el stream (o que se leyó a mitad de una línea): se vuelve a leer
+    desde el offset 0, y el reset inicial deja la réplica en estado limpio.
+    Si tras releer se llega otra vez al mismo punto, la línea es mala en este
+    stream: se registra, se salta y se sigue.
+    """
+
+    def __init__(self, path: str, target=None, poll_interval: float = POLL_INTERVAL):
+        if target is None:
+            from . import routes as target
+        self.path = path
+        self.target = target
+        self.poll_interval = poll_interval
+        self.applied_seq = 0
+        # applied_seq en el que ya se releyó el stream por estar desincronizado
+        self._resync_seq: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="replica-follower", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def wait_for_seq(self, seq: int, timeout: float = 5.0) -> bool:
+        deadline = time.monotonic() + timeout
+        while self.applied_seq < seq and time.monotonic() < deadline:
+            time.sleep(self.poll_interval)
+        return self.applied_seq >= seq
+
+    def _out_of_sync(self, reason: str) -> bool:
+        """Decidir si releer el stream desde el principio (una vez por punto de desincronización)"""
+        if self._resync_seq != self.applied_seq:
+            logger.warning("Replication stream out of sync after seq %s (%s); rereading from the start",
+                           self.applied_seq, reason)
+            self._resync_seq = self.applied_seq
+            return True
+        logger.error("Replication stream out of sync again after seq %s (%s); skipping", self.applied_seq, reason)
+        REPLICATION_ERRORS.inc()
+        return False
+
+    def _apply(self, line: str, at_start: bool) -> bool:
+        """Aplicar una línea completa; devuelve True si hay que releer desde el principio"""
+        try:
+            entry = json.loads(line)
+            seq = entry["seq"]
+        except (ValueError, KeyError, TypeError) as exc:
+            if not at_start:
+                return self._out_of_sync(f"unreadable line: {exc!r}")
+            logger.error("Skipping unreadable replication line: %r", exc)
+            REPLICATION_ERRORS.inc()
+            return False
+
+        if entry.get("op") == "reset" or seq == 1:
+            if not at_start and self._out_of_sync(f"stream restarted at seq {seq}"):
+                return True
+        elif seq != self.applied_seq + 1 and self._out_of_sync(f"expected seq {self.applied_seq + 1}, got {seq}"):
+            return True
+
+        try:
+            apply_mutation(entry, self.target)
+        except Exception:
+            logger.exception("Failed to apply replication seq %s", seq)
+            REPLICATION_ERRORS.inc()
+        else:
+            REPLICATION_APPLIED.inc()
+        self.applied_seq = seq
+        if self._resync_seq is not None and seq > self._resync_seq:
+            self._resync_seq = None
+        REPLICATION_APPLIED_SEQ.set(seq)
+        if isinstance(entry.get("ts"), (int, float)):
+            REPLICATION_LAG.set(max(0.0, time.time() - entry["ts"]))
+        return False
+
+    def _run(self):
+        while not self._stop.is_set():
+            REPLICATION_HEARTBEAT.set_to_current_time()
+            try:
+                source = open(self.path, encoding="utf-8")
+            except FileNotFoundError:
+                self._stop.wait(self.poll_interval)
+                continue
+            with source:
+                try:
+                    self._follow(source)
+                except Exception:
+                    # Nunca dejar morir el hilo: reabrir y seguir
+                    logger.exception("Replica follower failed; reopening %s", self.path)
+                    REPLICATION_ERRORS.inc()
+                    self._stop.wait(self.poll_interval)
+
+    def _follow(self, source):
+        inode = os.fstat(source.fileno()).st_ino
+        pending = ""
+        at_start = True
+        while not self._stop.is_set():
+            line = source.readline()
+            if line:
+                pending += line
+                if pending.endswith("\n"):
+                    if self._apply(pending, at_start):
+                        return
+                    pending = ""
+                    at_start = False
+                continue
+
+            # Al día con lo escrito; el lag se mide con el ts de la última
+            # mutación aplicada y el heartbeat muestra que el hilo sigue vivo
+            REPLICATION_HEARTBEAT.set_to_current_time()
+            try:
+                stat = os.stat(self.path)
+            except FileNotFoundError:
+                return
+            if stat.st_ino != inode or stat.st_size < source.tell():
+                # El primario reinició el stream: volver a leer desde el principio
+                return
+            self._stop.wait(self.poll_interval)
+
+
+def setup_replica_mode(app):
+    """Registrar un middleware que rechaza todo lo que no sea lectura"""
+
+    @app.middleware("http")
+    async def read_only_middleware(request: Request, call_next):
+        if request.method not in READ_ONLY_METHODS:
+            return JSONResponse(
+                status_code=403,
+                content={"detail": "Read-only replica: send writes to the primary"}
+            )
+        return await call_next(request)
@@ -1,15 +1,23 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import Dict, List, Optional
-from uuid import uuid4
 from datetime import datetime
+from .events import broker
+from .ids import new_id, intern_id, interner
+from .store import ShardedStore
+from .pricing import PriceHistory
+from .replication import mutations
 
 router = APIRouter()
 
 # In-memory storage
-clients = {}
-products = {}
+# clients y products están particionados por ID, cada shard con su lock.
+# Orden de locks entre stores: siempre clients antes que products.
+clients = ShardedStore()
+products = ShardedStore()
 sales = []
+orders = ShardedStore()  # order_id -> pedido, con sus líneas (ventas) indexadas
+price_history = ShardedStore()  # product_id -> PriceHistory, protegido por el lock del producto
 
 # Pydantic models
 class ClientIn(BaseModel):
@@ -61,6 +69,42 @@ class SaleOut(BaseModel):
     quantity: int
     total_amount: float
     created_at: datetime
+    order_id: Optional[str] = None
+    unit_price: Optional[float] = None
+    price_version: Optional[int] = None
+
+class PriceVersionOut(BaseModel):
+    version: int
+    price: float
+    valid_from: datetime
+    quantity_sold: int
+    revenue: float
+
+class PriceAtOut(BaseModel):
+    product_id: str
+    version: int
+    price: float
+
+class PriceBandOut(BaseModel):
+    band_min: float
+    band_max: float
+    quantity_sold: int
+    revenue: float
+
+class OrderLineIn(BaseModel):
+    product_id: str
+    quantity: int
+
+class OrderIn(BaseModel):
+    client_id: str
+    lines: List[OrderLineIn]
+
+class OrderOut(BaseModel):
+    id: str
+    client_id: str
+    lines: List[SaleOut]
+    total_amount: float
+    created_at: datetime
 
 # CLIENTS ENDPOINTS
 @router.post("/clients", response_model=Dict[str, str])
@@ -69,14 +113,16 @@ def create_client(client: ClientIn):
     if not client.name.strip():
         raise HTTPException(status_code=400, detail="Client name cannot be empty")
     
-    client_id = str(uuid4())
-    clients[client_id] = {
-        "id": client_id, 
-        "name": client.name,
-        "email": client.email,
-        "phone": client.phone,
-        "created_at": datetime.now()
-    }
+    client_id = intern_id(new_id())
+    with clients.locked(client_id):
+        clients[client_id] = {
+            "id": client_id, 
+            "name": client.name,
+            "email": client.email,
+            "phone": client.phone,
+            "created_at": datetime.now()
+        }
+        mutations.emit("put", store="clients", data=clients[client_id])
     return {"message": "Client created successfully", "client_id": client_id}
 
 @router.get("/clients", response_model=List[ClientOut])
@@ -94,30 +140,34 @@ def get_client(client_id: str):
 @router.put("/clients/{client_id}", response_model=Dict[str, str])
 def update_client(client_id: str, client_update: ClientUpdate):
     """Actualizar un cliente existente"""
-    if client_id not in clients:
-        raise HTTPException(status_code=404, detail="Client not found")
-    
-    client = clients[client_id]
-    update_data = client_update.model_dump(exclude_unset=True)
-    
-    if "name" in update_data and not update_data["name"].strip():
-        raise HTTPException(status_code=400, detail="Client name cannot be empty")
-    
-    client.update(update_data)
+    with clients.locked(client_id):
+        if client_id not in clients:
+            raise HTTPException(status_code=404, detail="Client not found")
+        
+        client = clients[client_id]
+        update_data = client_update.model_dump(exclude_unset=True)
+        
+        if "name" in update_data and not update_data["name"].strip():
+            raise HTTPException(status_code=400, detail="Client name cannot be empty")
+        
+        client.update(update_data)
+        mutations.emit("put", store="clients", data=client)
     return {"message": "Client updated successfully"}
 
 @router.delete("/clients/{client_id}", response_model=Dict[str, str])
 def delete_client(client_id: str):
     """Eliminar un cliente"""
-    if client_id not in clients:
-        raise HTTPException(status_code=404, detail="Client not found")
-    
-    # Check if client has sales
-    client_sales = [sale for sale in sales if sale.get("client_id") == client_id]
-    if client_sales:
-        raise HTTPException(status_code=400, detail="Cannot delete client with existing sales")
-    
-    del clients[client_id]
+    with clients.locked(client_id):
+        if client_id not in clients:
+            raise HTTPException(status_code=404, detail="Client not found")
+        
+        # Check if client has sales
+        if clients.ref_count(client_id):
+            raise HTTPException(status_code=400, detail="Cannot delete client with existing sales")
+        
+        del clients[client_id]
+        interner.discard(client_id)
+        mutations.emit("delete", store="clients", id=client_id)
     return {"message": "Client deleted successfully"}
 
 # PRODUCTS ENDPOINTS
@@ -129,15 +179,19 @@ def create_product(product: ProductIn):
     if product.price <= 0:
         raise HTTPException(status_code=400, detail="Product price must be greater than 0")
     
-    product_id = str(uuid4())
-    products[product_id] = {
-        "id": product_id,
-        "name": product.name,
-        "price": product.price,
-        "description": product.description,
-        "stock": product.stock,
-        "created_at": datetime.now()
-    }
+    product_id = intern_id(new_id())
+    created_at = datetime.now()
+    with products.locked(product_id):
+        price_history[product_id] = PriceHistory(product.price, created_at)
+        products[product_id] = {
+            "id": product_id,
+            "name": product.name,
+            "price": product.price,
+            "description": product.description,
+            "stock": product.stock,
+            "created_at": created_at
+        }
+        mutations.emit("put", store="products", data=products[product_id])
     return {"message": "Product created successfully", "product_id": product_id}
 
 @router.get("/products", response_model=List[ProductOut])
@@ -155,64 +209,112 @@ def get_product(product_id: str):
 @router.put("/products/{product_id}", response_model=Dict[str, str])
 def update_product(product_id: str, product_update: ProductUpdate):
     """Actualizar un producto existente"""
-    if product_id not in products:
-        raise HTTPException(status_code=404, detail="Product not found")
-    
-    product = products[product_id]
-    update_data = product_update.model_dump(exclude_unset=True)
-    
-    if "name" in update_data and not update_data["name"].strip():
-        raise HTTPException(status_code=400, detail="Product name cannot be empty")
-    if "price" in update_data and update_data["price"] <= 0:
-        raise HTTPException(status_code=400, detail="Product price must be greater than 0")
-    
-    product.update(update_data)
+    with products.locked(product_id):
+        if product_id not in products:
+            raise HTTPException(status_code=404, detail="Product not found")
+        
+        product = products[product_id]
+        update_data = product_update.model_dump(exclude_unset=True)
+        
+        if "name" in update_data and not update_data["name"].strip():
+            raise HTTPException(status_code=400, detail="Product name cannot be empty")
+        if "price" in update_data and update_data["price"] <= 0:
+            raise HTTPException(status_code=400, detail="Product price must be greater than 0")
+        
+        if "price" in update_data and update_data["price"] != product["price"]:
+            changed_at = datetime.now()
+            price_history[product_id].append(update_data["price"], changed_at)
+            mutations.emit("price", product_id=product_id, price=update_data["price"], at=changed_at)
+        product.update(update_data)
+        mutations.emit("put", store="products", data=product)
+        if "stock" in update_data:
+            broker.publish("stock", {"product_id": product_id, "stock": product["stock"]})
     return {"message": "Product updated successfully"}
 
+@router.get("/products/{product_id}/prices", response_model=List[PriceVersionOut])
+def get_price_history(product_id: str):
+    """Obtener el historial de precios de un producto con lo vendido en cada versión"""
+    with products.locked(product_id):
+        if product_id not in products:
+            raise HTTPException(status_code=404, detail="Product not found")
+        return price_history[product_id].versions()
+
+@router.get("/products/{product_id}/price", response_model=PriceAtOut)
+def get_price_at(product_id: str, at: datetime):
+    """Obtener el precio vigente de un producto en un instante dado"""
+    with products.locked(product_id):
+        if product_id not in products:
+            raise HTTPException(status_code=404, detail="Product not found")
+        if at.tzinfo is not None:
+            # Las marcas de tiempo se guardan en hora local sin zona, como created_at
+            at = at.astimezone().replace(tzinfo=None)
+        history = price_history[product_id]
+        version = history.version_at(at)
+        if version is None:
+            raise HTTPException(status_code=404, detail="No price before product creation")
+        return {"product_id": product_id, "version": version, "price": history.prices[version]}
+
 @router.delete("/products/{product_id}", response_model=Dict[str, str])
 def delete_product(product_id: str):
     """Eliminar un producto"""
-    if product_id not in products:
-        raise HTTPException(status_code=404, detail="Product not found")
-    
-    # Check if product has sales
-    product_sales = [sale for sale in sales if sale.get("product_id") == product_id]
-    if product_sales:
-        raise HTTPException(status_code=400, detail="Cannot delete product with existing sales")
-    
-    del products[product_id]
+    with products.locked(product_id):
+        if product_id not in products:
+            raise HTTPException(status_code=404, detail="Product not found")
+        
+        # Check if product has sales
+        if products.ref_count(product_id):
+            raise HTTPException(status_code=400, detail="Cannot delete product with existing sales")
+        
+        del products[product_id]
+        del price_history[product_id]
+        interner.discard(product_id)
+        mutations.emit("delete", store="products", id=product_id)
     return {"message": "Product deleted successfully"}
 
 # SALES ENDPOINTS
 @router.post("/sales")
 def create_sale(sale: SaleIn):
     """Crear una nueva venta"""
-    if sale.client_id not in clients:
-        raise HTTPException(status_code=400, detail="Client not found")
-    if sale.product_id not in products:
-        raise HTTPException(status_code=400, detail="Product not found")
-    if sale.quantity <= 0:
-        raise HTTPException(status_code=400, detail="Quantity must be greater than 0")
-    
-    product = products[sale.product_id]
-    if product["stock"] < sale.quantity:
-        raise HTTPException(status_code=400, detail="Insufficient stock")
-    
-    sale_id = str(uuid4())
-    total_amount = product["price"] * sale.quantity
-    
-    sale_record = {
-        "id": sale_id,
-        "client_id": sale.client_id,
-        "product_id": sale.product_id,
-        "quantity": sale.quantity,
-        "total_amount": total_amount,
-        "created_at": datetime.now()
-    }
-    
-    sales.append(sale_record)
-    # Update product stock
-    products[sale.product_id]["stock"] -= sale.quantity
+    # Lock del cliente y luego del producto: mismo orden en todos los handlers
+    with clients.locked(sale.client_id), products.locked(sale.product_id):
+        if sale.client_id not in clients:
+            raise HTTPException(status_code=400, detail="Client not found")
+        if sale.product_id not in products:
+            raise HTTPException(status_code=400, detail="Product not found")
+        if sale.quantity <= 0:
+            raise HTTPException(status_code=400, detail="Quantity must be greater than 0")
+        
+        product = products[sale.product_id]
+        if product["stock"] < sale.quantity:
+            raise HTTPException(status_code=400, detail="Insufficient stock")
+        
+        sale_id = new_id()
+        history = price_history[sale.product_id]
+        price_version = history.current_version
+        total_amount = product["price"] * sale.quantity
+        history.record_sale(price_version, sale.quantity, total_amount)
+        
+        sale_record = {
+            "id": sale_id,
+            "client_id": intern_id(sale.client_id),
+            "product_id": intern_id(sale.product_id),
+            "quantity": sale.quantity,
+            "total_amount": total_amount,
+            "created_at": datetime.now(),
+            "unit_price": product["price"],
+            "price_version": price_version
+        }
+        
+        sales.append(sale_record)
+        clients.add_ref(sale.client_id)
+        products.add_ref(sale.product_id)
+        # Update product stock
+        product["stock"] -= sale.quantity
+        mutations.emit("sale", data=sale_record, stock=product["stock"])
+        # Publicar con el lock del producto tomado para que los eventos de
+        # stock salgan en el mismo orden en que se aplicaron los cambios
+        broker.publish("sales", sale_record)
+        broker.publish("stock", {"product_id": sale.product_id, "stock": product["stock"]})
     
     return {"message": "Sale created successfully", "sale_id": sale_id, "total_amount": f"{total_amount:.2f}"}
 
@@ -244,3 +346,117 @@ def get_sales_by_product(product_id: str):
         raise HTTPException(status_code=404, detail="Product not found")
     product_sales = [sale for sale in sales if sale["product_id"] == product_id]
     return product_sales
+
+# ORDERS ENDPOINTS
+@router.post("/orders")
+def create_order(order: OrderIn):
+    """Crear un pedido con varias líneas de forma atómica"""
+    if not order.lines:
+        raise HTTPException(status_code=400, detail="Order must have at least one line")
+    
+    product_ids = [line.product_id for line in order.lines]
+    with clients.locked(order.client_id), products.locked(*product_ids):
+        if order.client_id not in clients:
+            raise HTTPException(status_code=400, detail="Client not found")
+        
+        # Reservar el stock y calcular importes línea a línea en una sola
+        # pasada; si alguna línea falla se devuelve lo reservado
+        order_id = new_id()
+        client_id = intern_id(order.client_id)
+        created_at = datetime.now()
+        reserved = []
+        lines = []
+        total_amount = 0.0
+        try:
+            for line in order.lines:
+                if line.product_id not in products:
+                    raise HTTPException(status_code=400, detail=f"Product not found: {line.product_id}")
+                if line.quantity <= 0:
+                    raise HTTPException(status_code=400, detail="Quantity must be greater than 0")
+                product = products[line.product_id]
+                if product["stock"] < line.quantity:
+                    raise HTTPException(status_code=400, detail=f"Insufficient stock for product {line.product_id}")
+                product["stock"] -= line.quantity
+                reserved.append((product, line.quantity))
+                
+                amount = product["price"] * line.quantity
+                total_amount += amount
+                lines.append({
+                    "id": new_id(),
+                    "client_id": client_id,
+                    "product_id": intern_id(line.product_id),
+                    "quantity": line.quantity,
+                    "total_amount": amount,
+                    "created_at": created_at,
+                    "order_id": order_id,
+                    "unit_price": product["price"],
+                    "price_version": price_history[line.product_id].current_version
+                })
+        except HTTPException:
+            for product, quantity in reserved:
+                product["stock"] += quantity
+            raise
+        
+        # Confirmar: índice de precios y contadores de referencias
+        for sale_record in lines:
+            price_history[sale_record["product_id"]].record_sale(
+                sale_record["price_version"], sale_record["quantity"], sale_record["total_amount"]
+            )
+            products.add_ref(sale_record["product_id"])
+        
+        sales.extend(lines)
+        clients.add_ref(client_id, len(lines))
+        orders[order_id] = {
+            "id": order_id,
+            "client_id": client_id,
+            "lines": lines,
+            "total_amount": total_amount,
+            "created_at": created_at
+        }
+        stock = {product_id: products[product_id]["stock"] for product_id in product_ids}
+        mutations.emit("order", data=orders[order_id], stock=stock)
+        for sale_record in lines:
+            broker.publish("sales", sale_record)
+        for product_id, product_stock in stock.items():
+            broker.publish("stock", {"product_id": product_id, "stock": product_stock})
+    
+    return {"message": "Order created successfully", "order_id": order_id, "total_amount": f"{total_amount:.2f}"}
+
+@router.get("/orders", response_model=List[OrderOut])
+def get_orders():
+    """Obtener todos los pedidos"""
+    return orders.values()
+
+@router.get("/orders/{order_id}", response_model=OrderOut)
+def get_order(order_id: str):
+    """Obtener un pedido específico por ID"""
+    order = orders.get(order_id)
+    if order is None:
+        raise HTTPException(status_code=404, detail="Order not found")
+    return order
+
+# ANALYTICS ENDPOINTS
+@router.get("/analytics/revenue-by-price-band", response_model=List[PriceBandOut])
+def get_revenue_by_price_band(band_width: float = 10.0):
+    """Revenue agrupado por rango de precio unitario, desde el índice de versiones"""
+    if band_width <= 0:
+        raise HTTPException(status_code=400, detail="Band width must be greater than 0")
+    
+    bands = {}
+    for history in price_history.values():
+        for price, quantity, revenue in zip(history.prices, history.quantity_sold, history.revenue):
+            if not quantity:
+                continue
+            band = bands.setdefault(int(price // band_width), [0, 0.0])
+            band[0] += quantity
+            band[1] += revenue
+    
+    return [
+        {
+            "band_min": index * band_width,
+            "band_max": (index + 1) * band_width,
+            "quantity_sold": quantity,
+            "revenue": revenue
+        }
+        for index, (quantity, revenue) in sorted(bands.items())
+    ]
@@ -0,0 +1,138 @@
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+from operator import itemgetter
+from typing import Any, Dict, Iterator, List
+import heapq
+import os
+import threading
+
+DEFAULT_SHARDS = int(os.getenv("STORE_SHARDS", "16"))
+
+
+class Shard:
+    """Partición del store: sus propios datos, contadores y lock"""
+
+    __slots__ = ("lock", "data", "refs")
+
+    def __init__(self):
+        # RLock: un handler que ya tomó el lock con locked() puede seguir
+        # usando las operaciones del mapping sobre el mismo shard
+        self.lock = threading.RLock()
+        self.data: Dict[str, Any] = {}
+        # Referencias entrantes por entidad (p.ej. ventas de un cliente)
+        self.refs: Dict[str, int] = {}
+
+
+class ShardedStore(MutableMapping):
+    """Diccionario en memoria particionado por hash del ID en N shards.
+
+    Las operaciones sobre una sola entidad toman solo el lock de su shard.
+    Para operar sobre varias entidades a la vez se usa locked(), que adquiere
+    los locks en orden ascendente de shard para evitar deadlocks. Entre stores
+    distintos el orden global es: clients antes que products.
+    """
+
+    def __init__(self, num_shards: int = DEFAULT_SHARDS):
+        if num_shards < 1:
+            raise ValueError("num_shards must be at least 1")
+        self.shards: List[Shard] = [Shard() for _ in range(num_shards)]
+
+    def shard_index(self, key: str) -> int:
+        return hash(key) % len(self.shards)
+
+    def shard_for(self, key: str) -> Shard:
+        return self.shards[self.shard_index(key)]
+
+    @contextmanager
+    def locked(self, *keys: str):
+        """Bloquear los shards de las claves dadas en orden determinista"""
+        if len(keys) == 1:
+            with self.shard_for(keys[0]).lock:
+                yield
+            return
+        indexes = sorted({self.shard_index(key) for key in keys})
+        acquired = []
+        try:
+            for index in indexes:
+                lock = self.shards[index].lock
+                lock.acquire()
+                acquired.append(lock)
+            yield
+        finally:
+            for lock in reversed(acquired):
+                lock.release()
+
+    @contextmanager
+    def locked_all(self):
+        """Bloquear todos los shards (para chequeos globales consistentes)"""
+        for shard in self.shards:
+            shard.lock.acquire()
+        try:
+            yield
+        finally:
+            for shard in reversed(self.shards):
+                shard.lock.release()
+
+    def add_ref(self, key: str, count: int = 1):
+        """Sumar (o restar) referencias a una entidad"""
+        shard = self.shard_for(key)
+        with shard.lock:
+            total = shard.refs.get(key, 0) + count
+            if total:
+                shard.refs[key] = total
+            else:
+                shard.refs.pop(key, None)
+
+    def ref_count(self, key: str) -> int:
+        """Número de referencias a una entidad, en O(1)"""
+        return self.shard_for(key).refs.get(key, 0)
+
+    def ref_counts(self) -> Dict[str, int]:
+        counts = {}
+        for shard in self.shards:
+            with shard.lock:
+                counts.update(shard.refs)
+        return counts
+
+    def __getitem__(self, key: str):
+        return self.shard_for(key).data[key]
+
+    def __setitem__(self, key: str, value):
+        shard = self.shard_for(key)
+        with shard.lock:
+            shard.data[key] = value
+
+    def __delitem__(self, key: str):
+        shard = self.shard_for(key)
+        with shard.lock:
+            del shard.data[key]
+
+    def __contains__(self, key) -> bool:
+        return key in self.shard_for(key).data
+
+    def get(self, key, default=None):
+        return self.shard_for(key).data.get(key, default)
+
+    def __len__(self) -> int:
+        return sum(len(shard.data) for shard in self.shards)
+
+    def _snapshot(self) -> List[List[tuple]]:
+        snapshots = []
+        for shard in self.shards:
+            with shard.lock:
+                snapshots.append(list(shard.data.items()))
+        return snapshots
+
+    def __iter__(self) -> Iterator[str]:
+        for key, _ in heapq.merge(*self._snapshot(), key=itemgetter(0)):
+            yield key
+
+    def values(self) -> List[Any]:
+        """Valores en orden de ID; con IDs de app.ids equivale al orden de creación"""
+        return [value for _, value in heapq.merge(*self._snapshot(), key=itemgetter(0))]
+
+    def clear(self):
+        for shard in self.shards:
+            with shard.lock:
+                shard.data.clear()
+                shard.refs.clear()
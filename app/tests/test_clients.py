@@ -69,6 +69,11 @@ class TestClients:
         response = client.put("/clients/nonexistent", json={"name": "Test"})
         assert response.status_code == 404
     
+    def test_update_client_not_found_before_validation(self, client):
+        """Prueba que un cliente inexistente dé 404 aunque los datos sean inválidos"""
+        response = client.put("/clients/nonexistent", json={"name": " "})
+        assert response.status_code == 404
+    
     def test_delete_client(self, client, sample_client_data):
         """Prueba eliminar cliente"""
         # Crear cliente
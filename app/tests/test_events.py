@@ -0,0 +1,214 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+from app import app
+from app.events import EventBroker, SUBSCRIBER_BUFFER, broker, encode_event
+
+
+def _decode(payload: bytes):
+    lines = payload.decode().strip().split("\n")
+    return lines[0].removeprefix("event: "), json.loads(lines[1].removeprefix("data: "))
+
+
+class _EventStream:
+    """Cliente ASGI mínimo para leer /events trozo a trozo sin bufferizar la respuesta"""
+
+    def __init__(self, query: bytes = b""):
+        self.scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+            "method": "GET", "scheme": "http", "path": "/events", "raw_path": b"/events",
+            "root_path": "", "query_string": query, "headers": [],
+            "server": ("testserver", 80), "client": ("testclient", 50000),
+        }
+        self.messages: asyncio.Queue = asyncio.Queue()
+        self.disconnected = asyncio.Event()
+        self._request_sent = False
+        self.task = None
+
+    async def _receive(self):
+        if not self._request_sent:
+            self._request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await self.disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def _send(self, message):
+        await self.messages.put(message)
+
+    async def open(self):
+        self.task = asyncio.create_task(app(self.scope, self._receive, self._send))
+        start = await asyncio.wait_for(self.messages.get(), timeout=5)
+        assert start["type"] == "http.response.start"
+        return start
+
+    async def read_until(self, marker: bytes) -> bytes:
+        """Leer el body hasta ver marker; devuelve lo leído"""
+        body = b""
+        while marker not in body:
+            message = await asyncio.wait_for(self.messages.get(), timeout=5)
+            body += message.get("body", b"")
+            if not message.get("more_body", False):
+                break
+        return body
+
+    async def close(self):
+        self.disconnected.set()
+        await asyncio.wait_for(self.task, timeout=5)
+
+
+class TestEventBroker:
+    """Pruebas para el broker de eventos SSE"""
+
+    def test_encode_event(self):
+        """Prueba el formato SSE de un evento"""
+        payload = encode_event("stock", {"product_id": "p1", "stock": 3})
+        assert payload == b'event: stock\ndata: {"product_id":"p1","stock":3}\n\n'
+
+    def test_publish_filters_by_topic(self):
+        """Prueba que cada suscriptor reciba solo sus tópicos"""
+        async def scenario():
+            events = EventBroker()
+            stock_sub = events.subscribe(["stock"])
+            sales_sub = events.subscribe(["sales"])
+            events.publish("stock", {"product_id": "p1", "stock": 1})
+            await asyncio.sleep(0)
+            return list(stock_sub.buffer), list(sales_sub.buffer)
+
+        stock_events, sales_events = asyncio.run(scenario())
+        assert len(stock_events) == 1
+        assert sales_events == []
+
+    def test_single_serialization_shared_by_subscribers(self):
+        """Prueba que todos los suscriptores compartan el mismo payload"""
+        async def scenario():
+            events = EventBroker()
+            subs = [events.subscribe(["sales"]) for _ in range(5)]
+            events.publish("sales", {"id": "s1"})
+            await asyncio.sleep(0)
+            return [s.buffer[0] for s in subs]
+
+        payloads = asyncio.run(scenario())
+        assert all(p is payloads[0] for p in payloads)
+
+    def test_publish_from_worker_thread(self):
+        """Prueba publicar desde un hilo distinto al del suscriptor"""
+        async def scenario():
+            events = EventBroker()
+            sub = events.subscribe(["stock"])
+            worker = threading.Thread(target=events.publish, args=("stock", {"stock": 7}))
+            worker.start()
+            worker.join()
+            await asyncio.wait_for(sub.ready.wait(), timeout=1)
+            return sub.buffer.popleft()
+
+        topic, data = _decode(asyncio.run(scenario()))
+        assert topic == "stock"
+        assert data == {"stock": 7}
+
+    def test_slow_consumer_evicted(self):
+        """Prueba que un suscriptor con el buffer lleno sea expulsado"""
+        async def scenario():
+            events = EventBroker()
+            sub = events.subscribe(["stock"], max_buffer=2)
+            for i in range(3):
+                events.publish("stock", {"stock": i})
+            await asyncio.sleep(0)
+            return sub
+
+        sub = asyncio.run(scenario())
+        assert sub.evicted
+        assert len(sub.buffer) == 0
+
+
+class TestEventsEndpoint:
+    """Pruebas para el endpoint /events"""
+
+    def test_unknown_topic(self, client):
+        """Prueba suscribirse a un tópico inexistente"""
+        response = client.get("/events?topics=stock,unknown")
+        assert response.status_code == 400
+        assert "Unknown topics" in response.json()["detail"]
+
+    def test_sale_publishes_stock_and_sale(self, client, setup_test_data):
+        """Prueba que crear una venta publique la venta y el nuevo stock"""
+        async def scenario():
+            sub = broker.subscribe(["stock", "sales"])
+            try:
+                response = client.post("/sales", json={
+                    "client_id": setup_test_data["client_id"],
+                    "product_id": setup_test_data["product_id"],
+                    "quantity": 2
+                })
+                assert response.status_code == 200
+                await asyncio.sleep(0)
+                return [_decode(p) for p in sub.buffer]
+            finally:
+                broker.unsubscribe(sub)
+
+        events = dict(asyncio.run(scenario()))
+        assert events["sales"]["product_id"] == setup_test_data["product_id"]
+        assert events["stock"] == {"product_id": setup_test_data["product_id"], "stock": 3}
+
+    def test_product_stock_update_publishes(self, client, setup_test_data):
+        """Prueba que actualizar el stock publique un evento"""
+        async def scenario():
+            sub = broker.subscribe(["stock"])
+            try:
+                client.put(f"/products/{setup_test_data['product_id']}", json={"stock": 42})
+                await asyncio.sleep(0)
+                return [_decode(p) for p in sub.buffer]
+            finally:
+                broker.unsubscribe(sub)
+
+        assert asyncio.run(scenario()) == [
+            ("stock", {"product_id": setup_test_data["product_id"], "stock": 42})
+        ]
+
+    def test_stream_delivers_sale(self, client, setup_test_data):
+        """Prueba el stream real: comentario inicial, venta entregada y baja al desconectar"""
+        async def scenario():
+            before = broker.subscriber_count()
+            stream = _EventStream(b"topics=sales")
+            start = await stream.open()
+            connected = await stream.read_until(b": connected")
+            subscribed = broker.subscriber_count()
+
+            response = await asyncio.to_thread(client.post, "/sales", json={
+                "client_id": setup_test_data["client_id"],
+                "product_id": setup_test_data["product_id"],
+                "quantity": 1
+            })
+            assert response.status_code == 200
+            body = await stream.read_until(b"\n\n")
+            await stream.close()
+            return before, subscribed, broker.subscriber_count(), start, connected, body
+
+        before, subscribed, after, start, connected, body = asyncio.run(scenario())
+        assert dict(start["headers"])[b"content-type"].startswith(b"text/event-stream")
+        assert connected == b": connected\n\n"
+        topic, data = _decode(body)
+        assert topic == "sales"
+        assert data["product_id"] == setup_test_data["product_id"]
+        assert subscribed == before + 1
+        assert after == before
+
+    def test_stream_evicts_slow_consumer(self):
+        """Prueba que un consumidor que no lee reciba el frame evicted y se dé de baja"""
+        async def scenario():
+            before = broker.subscriber_count()
+            stream = _EventStream(b"topics=stock")
+            await stream.open()
+            await stream.read_until(b": connected")
+            # Publicar más eventos de los que caben sin ceder el loop al stream
+            for i in range(SUBSCRIBER_BUFFER + 1):
+                broker.publish("stock", {"product_id": "p1", "stock": i})
+            body = await stream.read_until(b"event: evicted")
+            await asyncio.wait_for(stream.task, timeout=5)
+            return before, broker.subscriber_count(), body
+
+        before, after, body = asyncio.run(scenario())
+        assert body == b"event: evicted\ndata: {}\n\n"
+        assert after == before
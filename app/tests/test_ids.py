@@ -0,0 +1,46 @@
+import json
+
+from app.ids import IdInterner, new_id
+
+
+class TestIds:
+    """Pruebas para la generación e interning de IDs"""
+
+    def test_new_id_format(self):
+        """Prueba que el ID tenga formato UUID versión 7"""
+        entity_id = new_id()
+        parts = entity_id.split("-")
+        assert [len(p) for p in parts] == [8, 4, 4, 4, 12]
+        assert parts[2][0] == "7"
+
+    def test_new_id_monotonic_and_unique(self):
+        """Prueba que los IDs sean únicos y ordenados por creación"""
+        ids = [new_id() for _ in range(10000)]
+        assert ids == sorted(ids)
+        assert len(set(ids)) == len(ids)
+
+    def test_interner_returns_canonical_instance(self):
+        """Prueba que el interner devuelva siempre la misma instancia"""
+        interner = IdInterner()
+        original = new_id()
+        copy = json.loads(json.dumps(original))
+        assert copy is not original
+        assert interner.intern(original) is original
+        assert interner.intern(copy) is original
+        interner.discard(original)
+        assert len(interner) == 0
+
+    def test_sales_share_id_instances(self, client, setup_test_data):
+        """Prueba que las ventas reutilicen las instancias de ID del cliente y producto"""
+        from app.routes import clients, sales
+
+        client_id = setup_test_data["client_id"]
+        for _ in range(2):
+            client.post("/sales", json={
+                "client_id": client_id,
+                "product_id": setup_test_data["product_id"],
+                "quantity": 1
+            })
+        canonical = clients[client_id]["id"]
+        client_sales = [s for s in sales if s["client_id"] == client_id]
+        assert all(s["client_id"] is canonical for s in client_sales)
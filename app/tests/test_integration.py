@@ -1,6 +1,12 @@
+import os
+import subprocess
+import sys
+
 import pytest
 from fastapi.testclient import TestClient
 
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 
 class TestMetrics:
     """Pruebas para el endpoint de métricas"""
@@ -44,6 +50,92 @@ class TestMetrics:
         assert "active_clients_total" in final_content
 
 
+    def test_latency_buckets_below_5ms(self, client):
+        """Prueba que el histograma de latencia tenga buckets finos bajo 5ms"""
+        client.get("/health")
+        content = client.get("/metrics").text
+        assert 'http_request_duration_seconds_bucket{endpoint="/health",le="0.0005"}' in content
+        assert 'http_request_duration_seconds_bucket{endpoint="/health",le="0.002"}' in content
+
+    def test_latency_quantiles_endpoint(self, client):
+        """Prueba el endpoint de cuantiles de latencia en proceso"""
+        for _ in range(5):
+            client.get("/clients")
+        response = client.get("/metrics/latency")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["clients"]["count"] >= 5
+        assert 0 < data["clients"]["p50"] <= data["clients"]["p99"] <= data["clients"]["p999"]
+
+    def test_unmatched_paths_share_one_group(self, client):
+        """Prueba que los paths inexistentes no creen un sketch por path"""
+        from app.metrics import LATENCY_SKETCHES
+
+        for i in range(20):
+            assert client.get(f"/bogus-{i}/x").status_code == 404
+        groups = client.get("/metrics/latency").json()
+        assert not any(group.startswith("bogus-") for group in groups)
+        assert LATENCY_SKETCHES["other"].count >= 20
+
+    def test_endpoint_group(self):
+        """Prueba la agrupación de endpoints por primer segmento"""
+        from app.metrics import endpoint_group
+
+        assert endpoint_group("/sales/client/abc") == "sales"
+        assert endpoint_group("/") == "root"
+
+
+class TestStartup:
+    """Pruebas para la fase de arranque"""
+
+    def test_startup_metric_exposed(self, client):
+        """Prueba que se exponga el tiempo de arranque"""
+        response = client.get("/metrics")
+        assert "app_startup_seconds" in response.text
+
+    def test_warm_up_models(self):
+        """Prueba que el warm-up ejercite los modelos de entrada y salida"""
+        from app import warm_up_models
+
+        names = {model.__name__ for model in warm_up_models()}
+        assert {"ClientIn", "ClientOut", "ProductIn", "ProductOut", "SaleIn", "SaleOut"} <= names
+
+    def test_middleware_can_be_added_after_import(self, tmp_path):
+        """Prueba que el warm-up no congele la app: se puede añadir un middleware después"""
+        env = {k: v for k, v in os.environ.items() if k not in ("REPLICATION_LOG", "REPLICA_OF", "TRAFFIC_RECORD_PATH")}
+        script = (
+            "from fastapi.testclient import TestClient\n"
+            "from app import app\n"
+            "from app.recording import setup_recording\n"
+            f"recorder = setup_recording(app, {str(tmp_path / 'traffic.jsonl')!r})\n"
+            "assert TestClient(app).get('/health').status_code == 200\n"
+            "recorder.close()\n"
+        )
+        result = subprocess.run([sys.executable, "-c", script], cwd=ROOT, env=env,
+                                capture_output=True, text=True, timeout=60)
+        assert result.returncode == 0, result.stderr
+        assert '"path":"/health"' in (tmp_path / "traffic.jsonl").read_text()
+
+    def test_static_routes_listed_once(self):
+        """Prueba que cada ruta estática se prepare una sola vez"""
+        from app import _static_routes
+
+        routes = _static_routes()
+        assert len(routes) == len(set(routes))
+        assert {("GET", "/clients"), ("GET", "/health"), ("GET", "/admin/integrity")} <= set(routes)
+        assert ("GET", "/integrity") not in routes
+
+    def test_openapi_not_built_at_startup(self):
+        """Prueba que el esquema OpenAPI se genere bajo demanda"""
+        # En un proceso aparte: recargar el paquete aquí rehace la app de la sesión
+        env = {k: v for k, v in os.environ.items() if k not in ("REPLICATION_LOG", "REPLICA_OF", "TRAFFIC_RECORD_PATH")}
+        result = subprocess.run(
+            [sys.executable, "-c", "from app import app; assert app.openapi_schema is None"],
+            cwd=ROOT, env=env, capture_output=True, text=True, timeout=60,
+        )
+        assert result.returncode == 0, result.stderr
+
+
 class TestIntegration:
     """Pruebas de integración"""
     
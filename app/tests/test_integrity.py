@@ -0,0 +1,65 @@
+import pytest
+
+from app.routes import clients, products
+
+
+@pytest.fixture
+def sold_data(client, setup_test_data):
+    """Datos de prueba con dos ventas registradas"""
+    for _ in range(2):
+        client.post("/sales", json={
+            "client_id": setup_test_data["client_id"],
+            "product_id": setup_test_data["product_id"],
+            "quantity": 1
+        })
+    return setup_test_data
+
+
+class TestReferenceCounts:
+    """Pruebas para los contadores de integridad referencial"""
+
+    def test_sale_updates_counts(self, sold_data):
+        """Prueba que cada venta incremente los contadores"""
+        assert clients.ref_count(sold_data["client_id"]) == 2
+        assert products.ref_count(sold_data["product_id"]) == 2
+
+    def test_entities_without_sales_have_no_refs(self, setup_test_data):
+        """Prueba que las entidades sin ventas no tengan referencias"""
+        assert clients.ref_count(setup_test_data["client_id"]) == 0
+        assert products.ref_count(setup_test_data["product_id"]) == 0
+
+    def test_failed_sale_does_not_count(self, client, setup_test_data):
+        """Prueba que una venta rechazada no cambie los contadores"""
+        client.post("/sales", json={
+            "client_id": setup_test_data["client_id"],
+            "product_id": setup_test_data["product_id"],
+            "quantity": 100
+        })
+        assert clients.ref_count(setup_test_data["client_id"]) == 0
+
+    def test_integrity_endpoint_consistent(self, client, sold_data):
+        """Prueba el chequeo de consistencia sobre datos correctos"""
+        response = client.get("/admin/integrity")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["consistent"] is True
+        assert data["sales_scanned"] >= 2
+
+    def test_integrity_detects_and_repairs(self, client, sold_data):
+        """Prueba que el chequeo detecte y repare un contador corrupto"""
+        client_id = sold_data["client_id"]
+        clients.add_ref(client_id, 5)
+
+        data = client.get("/admin/integrity").json()
+        assert data["consistent"] is False
+        assert data["mismatches"]["clients"][client_id] == {"expected": 2, "counted": 7}
+
+        # GET solo lee, aunque se pida reparar
+        client.get("/admin/integrity?repair=true")
+        assert clients.ref_count(client_id) == 7
+
+        response = client.post("/admin/integrity/repair")
+        assert response.status_code == 200
+        assert response.json()["consistent"] is False
+        assert clients.ref_count(client_id) == 2
+        assert client.get("/admin/integrity").json()["consistent"] is True
@@ -0,0 +1,77 @@
+import tracemalloc
+
+import pytest
+
+from app.ids import new_id
+from app.memory import deep_sizeof, estimate_store_bytes
+from app.store import ShardedStore
+
+
+def _records(n):
+    return [{"id": new_id(), "name": f"name-{i}", "price": 1.5, "stock": i} for i in range(n)]
+
+
+class TestMemoryEstimates:
+    """Pruebas para la estimación de memoria por muestreo"""
+
+    def test_estimate_close_to_full_walk(self):
+        """Prueba que la estimación muestreada se acerque a la medición completa"""
+        records = _records(5000)
+        exact = deep_sizeof(records)
+        assert estimate_store_bytes(records) == pytest.approx(exact, rel=0.1)
+
+    def test_estimate_sharded_store_and_dict(self):
+        """Prueba la estimación sobre un ShardedStore y un dict equivalentes"""
+        records = _records(2000)
+        store = ShardedStore(num_shards=8)
+        plain = {}
+        for record in records:
+            store[record["id"]] = record
+            plain[record["id"]] = record
+        assert estimate_store_bytes(store) == pytest.approx(deep_sizeof(plain), rel=0.2)
+
+    def test_estimate_empty_store(self):
+        """Prueba un store vacío"""
+        assert estimate_store_bytes([]) > 0
+        assert estimate_store_bytes(ShardedStore(num_shards=2)) > 0
+
+
+class TestMemoryMetrics:
+    """Pruebas para las métricas de memoria"""
+
+    def test_memory_gauges_exposed(self, client, sample_client_data):
+        """Prueba que /metrics exponga entradas, bytes y series por métrica"""
+        from app.metrics import update_memory_metrics
+
+        client.post("/clients", json=sample_client_data)
+        update_memory_metrics(force=True)
+        content = client.get("/metrics").text
+        assert 'store_entries{store="clients"}' in content
+        assert 'store_estimated_bytes{store="sales"}' in content
+        assert 'metric_label_series{metric="http_requests"}' in content
+
+    def test_tracemalloc_endpoint(self, client):
+        """Prueba el snapshot de tracemalloc bajo demanda"""
+        was_tracing = tracemalloc.is_tracing()
+        try:
+            if not was_tracing:
+                # GET no arranca el trazado, ni siquiera con start=true
+                assert client.get("/admin/tracemalloc", params={"start": True}).status_code == 409
+                assert not tracemalloc.is_tracing()
+
+            assert client.post("/admin/tracemalloc").json() == {"tracing": True}
+            response = client.get("/admin/tracemalloc", params={"limit": 5})
+            assert response.status_code == 200
+            data = response.json()
+            assert data["tracing"] is True
+            assert len(data["top"]) <= 5
+            assert all(entry["size_bytes"] > 0 for entry in data["top"])
+        finally:
+            if not was_tracing:
+                client.delete("/admin/tracemalloc")
+        assert tracemalloc.is_tracing() == was_tracing
+
+    def test_tracemalloc_invalid_group_by(self, client):
+        """Prueba un group_by inválido"""
+        response = client.get("/admin/tracemalloc", params={"group_by": "bogus"})
+        assert response.status_code == 400
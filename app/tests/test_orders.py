@@ -0,0 +1,134 @@
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture
+def second_product_id(client):
+    """Segundo producto para pedidos con varias líneas"""
+    response = client.post("/products", json={
+        "name": "Second Product",
+        "price": 10.0,
+        "stock": 3
+    })
+    return response.json()["product_id"]
+
+
+class TestOrders:
+    """Pruebas para endpoints de pedidos"""
+
+    def test_create_order_success(self, client, setup_test_data, second_product_id):
+        """Prueba crear un pedido con varias líneas"""
+        response = client.post("/orders", json={
+            "client_id": setup_test_data["client_id"],
+            "lines": [
+                {"product_id": setup_test_data["product_id"], "quantity": 2},
+                {"product_id": second_product_id, "quantity": 3}
+            ]
+        })
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["message"] == "Order created successfully"
+        assert data["total_amount"] == "229.98"  # 99.99 * 2 + 10 * 3
+
+        assert client.get(f"/products/{setup_test_data['product_id']}").json()["stock"] == 3
+        assert client.get(f"/products/{second_product_id}").json()["stock"] == 0
+
+    def test_get_order_with_lines(self, client, setup_test_data, second_product_id):
+        """Prueba obtener un pedido con sus líneas"""
+        order_id = client.post("/orders", json={
+            "client_id": setup_test_data["client_id"],
+            "lines": [
+                {"product_id": setup_test_data["product_id"], "quantity": 1},
+                {"product_id": second_product_id, "quantity": 1}
+            ]
+        }).json()["order_id"]
+
+        response = client.get(f"/orders/{order_id}")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["client_id"] == setup_test_data["client_id"]
+        assert [line["product_id"] for line in data["lines"]] == [setup_test_data["product_id"], second_product_id]
+        assert all(line["order_id"] == order_id for line in data["lines"])
+        assert data["total_amount"] == pytest.approx(109.99)
+
+        # Cada línea es también una venta
+        sale = client.get(f"/sales/{data['lines'][0]['id']}").json()
+        assert sale["order_id"] == order_id
+
+    def test_order_rolls_back_on_insufficient_stock(self, client, setup_test_data, second_product_id):
+        """Prueba que un pedido con una línea inválida no reserve stock"""
+        sales_before = len(client.get("/sales").json())
+        response = client.post("/orders", json={
+            "client_id": setup_test_data["client_id"],
+            "lines": [
+                {"product_id": setup_test_data["product_id"], "quantity": 2},
+                {"product_id": second_product_id, "quantity": 4}
+            ]
+        })
+
+        assert response.status_code == 400
+        assert "Insufficient stock" in response.json()["detail"]
+        assert client.get(f"/products/{setup_test_data['product_id']}").json()["stock"] == 5
+        assert client.get(f"/products/{second_product_id}").json()["stock"] == 3
+        assert len(client.get("/sales").json()) == sales_before
+
+    def test_order_duplicate_lines_share_stock(self, client, setup_test_data):
+        """Prueba que líneas repetidas del mismo producto sumen su cantidad"""
+        response = client.post("/orders", json={
+            "client_id": setup_test_data["client_id"],
+            "lines": [
+                {"product_id": setup_test_data["product_id"], "quantity": 3},
+                {"product_id": setup_test_data["product_id"], "quantity": 3}
+            ]
+        })
+
+        assert response.status_code == 400
+        assert client.get(f"/products/{setup_test_data['product_id']}").json()["stock"] == 5
+
+    def test_order_invalid_client(self, client, setup_test_data):
+        """Prueba crear pedido con cliente inválido"""
+        response = client.post("/orders", json={
+            "client_id": "invalid_client",
+            "lines": [{"product_id": setup_test_data["product_id"], "quantity": 1}]
+        })
+        assert response.status_code == 400
+        assert "Client not found" in response.json()["detail"]
+
+    def test_order_invalid_product(self, client, setup_test_data):
+        """Prueba crear pedido con un producto inválido"""
+        response = client.post("/orders", json={
+            "client_id": setup_test_data["client_id"],
+            "lines": [
+                {"product_id": setup_test_data["product_id"], "quantity": 1},
+                {"product_id": "invalid_product", "quantity": 1}
+            ]
+        })
+        assert response.status_code == 400
+        assert "Product not found" in response.json()["detail"]
+        assert client.get(f"/products/{setup_test_data['product_id']}").json()["stock"] == 5
+
+    def test_order_empty_lines(self, client, setup_test_data):
+        """Prueba crear pedido sin líneas"""
+        response = client.post("/orders", json={
+            "client_id": setup_test_data["client_id"],
+            "lines": []
+        })
+        assert response.status_code == 400
+        assert "at least one line" in response.json()["detail"]
+
+    def test_order_blocks_deletes(self, client, setup_test_data):
+        """Prueba que un pedido cuente como referencia para los deletes"""
+        client.post("/orders", json={
+            "client_id": setup_test_data["client_id"],
+            "lines": [{"product_id": setup_test_data["product_id"], "quantity": 1}]
+        })
+        assert client.delete(f"/clients/{setup_test_data['client_id']}").status_code == 400
+        assert client.delete(f"/products/{setup_test_data['product_id']}").status_code == 400
+        assert client.get("/admin/integrity").json()["consistent"] is True
+
+    def test_get_order_not_found(self, client):
+        """Prueba obtener pedido que no existe"""
+        response = client.get("/orders/nonexistent")
+        assert response.status_code == 404
+        assert "Order not found" in response.json()["detail"]
@@ -0,0 +1,102 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.pricing import PriceHistory
+
+
+class TestPriceHistory:
+    """Pruebas para el historial de precios"""
+
+    def test_price_at_uses_versions(self):
+        """Prueba la búsqueda del precio vigente en un instante"""
+        start = datetime(2026, 1, 1)
+        history = PriceHistory(10.0, start)
+        history.append(12.0, start + timedelta(days=1))
+        history.append(9.0, start + timedelta(days=2))
+
+        assert history.price_at(start - timedelta(seconds=1)) is None
+        assert history.price_at(start) == 10.0
+        assert history.version_at(start + timedelta(hours=36)) == 1
+        assert history.price_at(start + timedelta(days=5)) == 9.0
+        assert history.current_version == 2
+
+    def test_clock_going_backwards_keeps_order(self):
+        """Prueba que un reloj hacia atrás no rompa la búsqueda binaria"""
+        start = datetime(2026, 1, 1)
+        history = PriceHistory(10.0, start)
+        history.append(11.0, start - timedelta(minutes=1))
+        assert history.valid_from == sorted(history.valid_from)
+        assert history.price_at(start) == 11.0
+
+    def test_record_sale_per_version(self):
+        """Prueba la acumulación de ventas por versión de precio"""
+        history = PriceHistory(10.0, datetime(2026, 1, 1))
+        history.record_sale(0, 2, 20.0)
+        history.append(15.0, datetime(2026, 1, 2))
+        history.record_sale(1, 1, 15.0)
+        assert [(v["quantity_sold"], v["revenue"]) for v in history.versions()] == [(2, 20.0), (1, 15.0)]
+
+
+class TestPricingEndpoints:
+    """Pruebas para los endpoints de precios"""
+
+    def _sell(self, client, data, quantity=1):
+        return client.post("/sales", json={
+            "client_id": data["client_id"],
+            "product_id": data["product_id"],
+            "quantity": quantity
+        }).json()["sale_id"]
+
+    def test_sale_records_price_version(self, client, setup_test_data):
+        """Prueba que cada venta guarde el precio y la versión usados"""
+        product_id = setup_test_data["product_id"]
+        first = self._sell(client, setup_test_data)
+        client.put(f"/products/{product_id}", json={"price": 120.0})
+        second = self._sell(client, setup_test_data)
+
+        first_sale = client.get(f"/sales/{first}").json()
+        second_sale = client.get(f"/sales/{second}").json()
+        assert (first_sale["unit_price"], first_sale["price_version"]) == (99.99, 0)
+        assert (second_sale["unit_price"], second_sale["price_version"]) == (120.0, 1)
+
+    def test_price_history_endpoint(self, client, setup_test_data):
+        """Prueba el historial de precios con lo vendido por versión"""
+        product_id = setup_test_data["product_id"]
+        self._sell(client, setup_test_data, quantity=2)
+        client.put(f"/products/{product_id}", json={"price": 120.0})
+        client.put(f"/products/{product_id}", json={"stock": 10})  # sin cambio de precio
+
+        response = client.get(f"/products/{product_id}/prices")
+        assert response.status_code == 200
+        versions = response.json()
+        assert [v["price"] for v in versions] == [99.99, 120.0]
+        assert versions[0]["quantity_sold"] == 2
+        assert versions[0]["revenue"] == pytest.approx(199.98)
+
+    def test_price_at_endpoint(self, client, setup_test_data):
+        """Prueba consultar el precio vigente en un instante"""
+        product_id = setup_test_data["product_id"]
+        before_update = datetime.now().isoformat()
+        client.put(f"/products/{product_id}", json={"price": 120.0})
+
+        old = client.get(f"/products/{product_id}/price", params={"at": before_update}).json()
+        assert (old["version"], old["price"]) == (0, 99.99)
+        current = client.get(f"/products/{product_id}/price", params={"at": datetime.now().isoformat()}).json()
+        assert current["price"] == 120.0
+
+        too_early = client.get(f"/products/{product_id}/price", params={"at": "2000-01-01T00:00:00"})
+        assert too_early.status_code == 404
+
+    def test_revenue_by_price_band(self, client, setup_test_data):
+        """Prueba el revenue agrupado por rango de precio"""
+        self._sell(client, setup_test_data, quantity=1)
+        response = client.get("/analytics/revenue-by-price-band", params={"band_width": 50})
+        assert response.status_code == 200
+        bands = {(b["band_min"], b["band_max"]): b for b in response.json()}
+        assert bands[(50.0, 100.0)]["quantity_sold"] >= 1
+
+    def test_revenue_by_price_band_invalid_width(self, client):
+        """Prueba un ancho de banda inválido"""
+        response = client.get("/analytics/revenue-by-price-band", params={"band_width": 0})
+        assert response.status_code == 400
@@ -84,6 +84,11 @@ class TestProducts:
         response = client.put("/products/nonexistent", json={"name": "Test"})
         assert response.status_code == 404
     
+    def test_update_product_not_found_before_validation(self, client):
+        """Prueba que un producto inexistente dé 404 aunque los datos sean inválidos"""
+        response = client.put("/products/nonexistent", json={"price": -1})
+        assert response.status_code == 404
+    
     def test_delete_product(self, client, sample_product_data):
         """Prueba eliminar producto"""
         # Crear producto
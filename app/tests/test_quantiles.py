@@ -0,0 +1,50 @@
+import random
+
+import pytest
+
+from app.quantiles import LatencySketch
+
+
+class TestLatencySketch:
+    """Pruebas para el estimador de cuantiles en streaming"""
+
+    def test_empty_sketch(self):
+        """Prueba un sketch sin observaciones"""
+        sketch = LatencySketch()
+        assert sketch.quantile(0.5) is None
+        assert sketch.summary()["count"] == 0
+
+    def test_relative_error_bound(self):
+        """Prueba que los cuantiles respeten el error relativo"""
+        rng = random.Random(42)
+        values = [rng.lognormvariate(-7, 1) for _ in range(20000)]
+        sketch = LatencySketch(relative_accuracy=0.01)
+        for value in values:
+            sketch.add(value)
+
+        values.sort()
+        for q in (0.5, 0.9, 0.99, 0.999):
+            exact = values[int(q * (len(values) - 1))]
+            assert sketch.quantile(q) == pytest.approx(exact, rel=0.011)
+
+    def test_bounded_memory(self):
+        """Prueba que la memoria no crezca con el número de observaciones"""
+        sketch = LatencySketch(relative_accuracy=0.01)
+        for i in range(1, 100001):
+            sketch.add(i * 1e-5)
+        assert len(sketch._buckets) < 700
+
+    def test_summary_keys_and_reset(self):
+        """Prueba el resumen por defecto y el reinicio"""
+        sketch = LatencySketch()
+        sketch.add(0.001)
+        assert set(sketch.summary()) == {"count", "sum", "max", "p50", "p99", "p999"}
+        sketch.reset()
+        assert sketch.count == 0
+
+    def test_invalid_arguments(self):
+        """Prueba parámetros inválidos"""
+        with pytest.raises(ValueError):
+            LatencySketch(relative_accuracy=1.5)
+        with pytest.raises(ValueError):
+            LatencySketch().quantile(2)
@@ -0,0 +1,137 @@
+import asyncio
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.recording import setup_recording
+from app.replay import load_entries, replay, route_key
+from app.routes import router
+
+
+@pytest.fixture
+def recorded_log(tmp_path):
+    """Graba un flujo cliente -> producto -> venta con el middleware de grabación"""
+    log_path = tmp_path / "traffic.jsonl"
+    recording_app = FastAPI()
+    recording_app.include_router(router)
+    recorder = setup_recording(recording_app, str(log_path))
+
+    with TestClient(recording_app) as http:
+        client_id = http.post("/clients", json={"name": "Replay Client"}).json()["client_id"]
+        product_id = http.post("/products", json={"name": "Replay Product", "price": 5.0, "stock": 10}).json()["product_id"]
+        http.post("/sales", json={"client_id": client_id, "product_id": product_id, "quantity": 2})
+        http.get(f"/clients/{client_id}")
+        http.get(f"/sales/product/{product_id}")
+    recorder.close()
+    return log_path
+
+
+class TestRecording:
+    """Pruebas para el middleware de grabación de tráfico"""
+
+    def test_recording_format(self, recorded_log):
+        """Prueba que cada request quede grabado en JSONL"""
+        entries = [json.loads(line) for line in recorded_log.read_text().splitlines()]
+        assert [e["method"] for e in entries] == ["POST", "POST", "POST", "GET", "GET"]
+        assert entries[0]["body"] == {"name": "Replay Client"}
+        assert entries[0]["status"] == 200
+        assert set(entries[0]["response_ids"]) == {"client_id"}
+        assert entries[2]["response_ids"].keys() == {"sale_id"}
+        assert all(e["duration"] >= 0 and e["ts"] > 0 for e in entries)
+
+    def test_recording_keeps_repeated_headers(self, tmp_path):
+        """Prueba que reconstruir la respuesta de un POST no colapse cabeceras repetidas"""
+        from fastapi import Response as FastAPIResponse
+
+        recording_app = FastAPI()
+
+        @recording_app.post("/login")
+        def login(response: FastAPIResponse):
+            response.set_cookie("session", "abc")
+            response.set_cookie("csrf", "xyz")
+            return {"user_id": "u1"}
+
+        recorder = setup_recording(recording_app, str(tmp_path / "traffic.jsonl"))
+        with TestClient(recording_app) as http:
+            response = http.post("/login")
+        recorder.close()
+
+        assert len(response.headers.get_list("set-cookie")) == 2
+        assert response.json() == {"user_id": "u1"}
+
+
+class TestReplay:
+    """Pruebas para el harness de replay"""
+
+    def test_load_entries_skips_non_http_lines(self, tmp_path):
+        """Prueba que se salten líneas que no son requests"""
+        log = tmp_path / "mixed.jsonl"
+        log.write_text(
+            '{"request_id": "user-001", "title": "x", "body": "y"}\n'
+            'not json\n'
+            '{"method": "GET", "path": "/health"}\n'
+        )
+        entries, skipped = load_entries(str(log))
+        assert entries == [{"method": "GET", "path": "/health"}]
+        assert skipped == 2
+
+    def test_route_key(self):
+        """Prueba la normalización de paths a plantillas de ruta"""
+        assert route_key("GET", "/sales/client/abc", {"abc"}) == "GET /sales/client/{id}"
+        assert route_key("GET", "/clients/01a153fa-2aa4-7000-a0fd-f03a768bbcef", set()) == "GET /clients/{id}"
+
+    def test_replay_in_process_remaps_ids(self, recorded_log):
+        """Prueba reproducir en proceso remapeando los IDs creados"""
+        from app.routes import sales
+
+        entries, _ = load_entries(str(recorded_log))
+        sales_before = len(sales)
+        report = asyncio.run(replay(entries, concurrency=4))
+
+        assert report["requests"] == 5
+        assert report["errors"] == 0
+        assert len(sales) == sales_before + 1
+        assert "GET /sales/product/{id}" in report["routes"]
+        route = report["routes"]["POST /clients"]
+        assert route["count"] == 1 and route["p50"] > 0
+
+    def test_replay_skips_and_bounds_event_streams(self, tmp_path):
+        """Prueba que un log con /events no bloquee el replay"""
+        from app import app
+        from app.events import broker
+
+        # El recorder marca las respuestas SSE (aquí un stream finito con el mismo tipo)
+        log_path = tmp_path / "traffic.jsonl"
+        recording_app = FastAPI()
+
+        @recording_app.get("/events")
+        def events():
+            return StreamingResponse(iter([b": connected\n\n"]), media_type="text/event-stream")
+
+        recorder = setup_recording(recording_app, str(log_path))
+        with TestClient(recording_app) as http:
+            assert http.get("/events").status_code == 200
+        recorder.close()
+        recorded = [json.loads(line) for line in log_path.read_text().splitlines()]
+        assert recorded[0]["path"] == "/events" and recorded[0]["stream"] is True
+
+        before = broker.subscriber_count()
+        entries = recorded + [
+            {"method": "GET", "path": "/events"},  # log antiguo, sin marcar
+            {"method": "GET", "path": "/health"},
+        ]
+        report = asyncio.run(asyncio.wait_for(replay(entries, app=app, request_timeout=0.5), timeout=10))
+
+        assert report["skipped_streams"] == 1
+        assert report["routes"]["GET /events"]["errors"] == 1
+        assert report["routes"]["GET /health"]["errors"] == 0
+        assert broker.subscriber_count() == before
+
+    def test_replay_with_speedup(self, recorded_log):
+        """Prueba reproducir respetando los tiempos grabados con aceleración"""
+        entries, _ = load_entries(str(recorded_log))
+        report = asyncio.run(replay(entries, concurrency=2, speed=100.0))
+        assert report["errors"] == 0
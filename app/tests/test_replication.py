@@ -0,0 +1,308 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.replication import ReplicaFollower, apply_mutation, mutations, setup_replica_mode
+from app.store import ShardedStore
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _empty_stores():
+    return SimpleNamespace(
+        clients=ShardedStore(), products=ShardedStore(), sales=[],
+        orders=ShardedStore(), price_history=ShardedStore()
+    )
+
+
+@pytest.fixture
+def mutation_log(tmp_path):
+    """Abre el stream de mutaciones del primario durante la prueba"""
+    path = tmp_path / "mutations.jsonl"
+    mutations.open(str(path))
+    yield path
+    mutations.close()
+
+
+class TestMutationStream:
+    """Pruebas para el stream de mutaciones y su aplicación"""
+
+    def test_replica_state_matches_primary(self, client, mutation_log):
+        """Prueba que aplicar el stream reproduzca el estado del primario"""
+        client_id = client.post("/clients", json={"name": "Replica Client"}).json()["client_id"]
+        product_id = client.post("/products", json={"name": "Replica Product", "price": 10.0, "stock": 10}).json()["product_id"]
+        client.put(f"/clients/{client_id}", json={"email": "replica@test.com"})
+        client.post("/sales", json={"client_id": client_id, "product_id": product_id, "quantity": 2})
+        client.put(f"/products/{product_id}", json={"price": 12.5})
+        order_id = client.post("/orders", json={
+            "client_id": client_id,
+            "lines": [{"product_id": product_id, "quantity": 3}]
+        }).json()["order_id"]
+        temp_id = client.post("/clients", json={"name": "Temporary"}).json()["client_id"]
+        client.delete(f"/clients/{temp_id}")
+        mutations.close()
+
+        replica = _empty_stores()
+        for line in mutation_log.read_text().splitlines():
+            apply_mutation(json.loads(line), replica)
+
+        primary_product = client.get(f"/products/{product_id}").json()
+        assert replica.products[product_id]["stock"] == primary_product["stock"] == 5
+        assert replica.products[product_id]["price"] == 12.5
+        assert replica.clients[client_id]["email"] == "replica@test.com"
+        assert temp_id not in replica.clients
+        assert len(replica.sales) == 2
+        assert replica.orders[order_id]["lines"][0]["unit_price"] == 12.5
+        assert replica.clients.ref_count(client_id) == 2
+        history = replica.price_history[product_id]
+        assert history.prices == [10.0, 12.5]
+        assert history.quantity_sold == [2, 3]
+
+    def test_stream_starts_with_reset(self, mutation_log):
+        """Prueba que un stream nuevo empiece con un reset"""
+        mutations.close()
+        first = json.loads(mutation_log.read_text().splitlines()[0])
+        assert (first["seq"], first["op"]) == (1, "reset")
+
+    def test_product_stock_put_publishes_and_delete_discards_id(self):
+        """Prueba que un cambio de stock por PUT se publique y que una baja libere el ID internado"""
+        import asyncio
+        from app.events import broker
+        from app.ids import intern_id, interner
+
+        product_id = intern_id("replica-product-1")
+        product = {"id": product_id, "name": "P", "price": 1.0, "description": None,
+                   "stock": 5, "created_at": "2026-01-01T00:00:00"}
+        replica = _empty_stores()
+
+        async def scenario():
+            sub = broker.subscribe(["stock"])
+            try:
+                apply_mutation({"op": "put", "store": "products", "data": dict(product)}, replica)
+                apply_mutation({"op": "put", "store": "products", "data": dict(product, name="Q")}, replica)
+                apply_mutation({"op": "put", "store": "products", "data": dict(product, stock=9)}, replica)
+                await asyncio.sleep(0)
+                return [json.loads(p.split(b"data: ")[1]) for p in sub.buffer]
+            finally:
+                broker.unsubscribe(sub)
+
+        assert asyncio.run(scenario()) == [{"product_id": product_id, "stock": 9}]
+        interned = len(interner)
+        apply_mutation({"op": "delete", "store": "products", "id": product_id}, replica)
+        assert product_id not in replica.products
+        assert len(interner) == interned - 1
+
+    def test_sales_do_not_grow_intern_table(self):
+        """Prueba que aplicar ventas no interne sus IDs únicos"""
+        from app.ids import interner, new_id
+
+        replica = _empty_stores()
+        product = {"id": "p-intern", "name": "P", "price": 1.0, "description": None,
+                   "stock": 100, "created_at": "2026-01-01T00:00:00"}
+        client = {"id": "c-intern", "name": "C", "email": None, "phone": None, "created_at": "2026-01-01T00:00:00"}
+        apply_mutation({"op": "put", "store": "products", "data": product}, replica)
+        apply_mutation({"op": "put", "store": "clients", "data": client}, replica)
+        interned = len(interner)
+        for stock in range(99, 49, -1):
+            sale = {"id": new_id(), "client_id": "c-intern", "product_id": "p-intern", "quantity": 1,
+                    "total_amount": 1.0, "created_at": "2026-01-01T00:00:00", "price_version": 0}
+            apply_mutation({"op": "sale", "data": sale, "stock": stock}, replica)
+
+        assert len(replica.sales) == 50
+        assert len(interner) == interned
+        assert replica.sales[0]["client_id"] is replica.clients["c-intern"]["id"]
+        interner.discard("c-intern")
+        interner.discard("p-intern")
+
+    def test_unknown_op(self):
+        """Prueba una operación desconocida"""
+        with pytest.raises(ValueError):
+            apply_mutation({"op": "bogus"}, _empty_stores())
+
+
+class TestReplicaFollower:
+    """Pruebas para el seguimiento del archivo de mutaciones"""
+
+    def _entry(self, seq, op, **fields):
+        return json.dumps({"seq": seq, "ts": time.time(), "op": op, **fields}) + "\n"
+
+    def test_follows_appends_and_partial_lines(self, tmp_path):
+        """Prueba seguir el archivo con líneas escritas a medias"""
+        path = tmp_path / "mutations.jsonl"
+        replica = _empty_stores()
+        follower = ReplicaFollower(str(path), target=replica, poll_interval=0.01).start()
+        try:
+            client = {"id": "c1", "name": "A", "email": None, "phone": None, "created_at": "2026-01-01T00:00:00"}
+            line = self._entry(1, "reset") + self._entry(2, "put", store="clients", data=client)
+            with open(path, "w") as output:
+                output.write(line[:-20])
+                output.flush()
+                time.sleep(0.05)
+                output.write(line[-20:])
+            assert follower.wait_for_seq(2)
+            assert replica.clients["c1"]["name"] == "A"
+        finally:
+            follower.stop()
+
+    def test_restarted_stream_is_reapplied(self, tmp_path):
+        """Prueba que un stream truncado (primario reiniciado) se vuelva a leer"""
+        path = tmp_path / "mutations.jsonl"
+        client = {"id": "c1", "name": "A", "email": None, "phone": None, "created_at": "2026-01-01T00:00:00"}
+        path.write_text(self._entry(1, "reset") + self._entry(2, "put", store="clients", data=client))
+        replica = _empty_stores()
+        follower = ReplicaFollower(str(path), target=replica, poll_interval=0.01).start()
+        try:
+            assert follower.wait_for_seq(2)
+            path.write_text(self._entry(1, "reset"))
+            deadline = time.monotonic() + 5
+            while "c1" in replica.clients and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert "c1" not in replica.clients
+        finally:
+            follower.stop()
+
+    def test_bad_line_does_not_stop_follower(self, tmp_path):
+        """Prueba que una mutación que falla al aplicarse se salte sin matar el hilo"""
+        from app.metrics import REPLICATION_ERRORS
+
+        path = tmp_path / "mutations.jsonl"
+        client = {"id": "c1", "name": "A", "email": None, "phone": None, "created_at": "2026-01-01T00:00:00"}
+        path.write_text(
+            self._entry(1, "reset")
+            + self._entry(2, "put", store="clients")  # sin data: KeyError al aplicar
+            + self._entry(3, "put", store="clients", data=client)
+        )
+        errors = REPLICATION_ERRORS._value.get()
+        replica = _empty_stores()
+        follower = ReplicaFollower(str(path), target=replica, poll_interval=0.01).start()
+        try:
+            assert follower.wait_for_seq(3)
+            assert replica.clients["c1"]["name"] == "A"
+            assert REPLICATION_ERRORS._value.get() == errors + 1
+
+            with open(path, "a") as output:
+                output.write("{not json\n" + self._entry(4, "delete", store="clients", id="c1"))
+            assert follower.wait_for_seq(4)
+            assert "c1" not in replica.clients
+            assert follower._thread.is_alive()
+        finally:
+            follower.stop()
+
+    def test_restart_written_past_old_offset(self, tmp_path):
+        """Prueba un primario reiniciado que ya escribió más allá del offset de la réplica"""
+        path = tmp_path / "mutations.jsonl"
+
+        def client(client_id, name):
+            return {"id": client_id, "name": name, "email": None, "phone": None, "created_at": "2026-01-01T00:00:00"}
+
+        path.write_text(self._entry(1, "reset") + self._entry(2, "put", store="clients", data=client("c0", "Old")))
+        replica = _empty_stores()
+        follower = ReplicaFollower(str(path), target=replica, poll_interval=0.01).start()
+        try:
+            assert follower.wait_for_seq(2)
+            # Sobrescribir sin truncar: el tamaño nunca baja del offset de la réplica
+            restarted = self._entry(1, "reset") + "".join(
+                self._entry(seq, "put", store="clients", data=client(f"n{seq}", "New client " * seq))
+                for seq in range(2, 6)
+            )
+            with open(path, "r+") as output:
+                output.write(restarted)
+            deadline = time.monotonic() + 5
+            while ("c0" in replica.clients or "n5" not in replica.clients) and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert "c0" not in replica.clients
+            assert sorted(replica.clients.keys()) == ["n2", "n3", "n4", "n5"]
+            assert follower.applied_seq == 5
+            assert follower._thread.is_alive()
+        finally:
+            follower.stop()
+
+
+class TestReplicaMode:
+    """Pruebas para el modo réplica de solo lectura"""
+
+    def test_replica_rejects_writes(self):
+        """Prueba que una réplica solo atienda lecturas"""
+        replica_app = FastAPI()
+
+        @replica_app.get("/ping")
+        def ping():
+            return {"ok": True}
+
+        @replica_app.post("/ping")
+        def write_ping():
+            return {"ok": True}
+
+        setup_replica_mode(replica_app)
+        http = TestClient(replica_app)
+        assert http.get("/ping").status_code == 200
+        response = http.post("/ping")
+        assert response.status_code == 403
+        assert "Read-only replica" in response.json()["detail"]
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _start_server(port, env):
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, env=dict(os.environ, **env),
+    )
+
+
+def _wait_until(predicate, timeout=15.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if predicate():
+                return True
+        except httpx.TransportError:
+            pass
+        time.sleep(0.05)
+    return False
+
+
+class TestTwoProcessReplication:
+    """Prueba local con dos procesos: un primario y una réplica"""
+
+    def test_primary_and_replica(self, tmp_path):
+        """Prueba que la réplica sirva los datos escritos en el primario"""
+        log_path = str(tmp_path / "mutations.jsonl")
+        primary_port, replica_port = _free_port(), _free_port()
+        primary = _start_server(primary_port, {"REPLICATION_LOG": log_path})
+        replica = _start_server(replica_port, {"REPLICA_OF": log_path})
+        try:
+            with httpx.Client(base_url=f"http://127.0.0.1:{primary_port}") as p, \
+                    httpx.Client(base_url=f"http://127.0.0.1:{replica_port}") as r:
+                assert _wait_until(lambda: p.get("/health").status_code == 200)
+                assert _wait_until(lambda: r.get("/health").status_code == 200)
+
+                client_id = p.post("/clients", json={"name": "Two Process"}).json()["client_id"]
+                product_id = p.post("/products", json={"name": "P", "price": 2.0, "stock": 4}).json()["product_id"]
+                p.post("/sales", json={"client_id": client_id, "product_id": product_id, "quantity": 3})
+
+                assert _wait_until(lambda: r.get(f"/products/{product_id}").json().get("stock") == 1)
+                assert len(r.get(f"/sales/client/{client_id}").json()) == 1
+
+                rejected = r.post("/clients", json={"name": "Nope"})
+                assert rejected.status_code == 403
+                metrics = r.get("/metrics").text
+                assert "replication_lag_seconds" in metrics
+                assert "replication_applied_seq 4.0" in metrics
+        finally:
+            for process in (primary, replica):
+                process.terminate()
+                process.wait()
@@ -0,0 +1,123 @@
+import json
+import sys
+import threading
+
+import pytest
+
+from app.ids import new_id
+from app.store import ShardedStore
+
+
+class TestShardedStore:
+    """Pruebas para el store particionado"""
+
+    def test_mapping_operations(self):
+        """Prueba las operaciones básicas de diccionario"""
+        store = ShardedStore(num_shards=4)
+        store["a"] = 1
+        store["b"] = 2
+        assert "a" in store and store["a"] == 1
+        assert store.get("missing") is None
+        assert len(store) == 2
+        del store["a"]
+        assert "a" not in store
+        with pytest.raises(KeyError):
+            store["a"]
+
+    def test_values_in_creation_order(self):
+        """Prueba que values() respete el orden de creación de los IDs"""
+        store = ShardedStore(num_shards=8)
+        ids = [new_id() for _ in range(200)]
+        for entity_id in ids:
+            store[entity_id] = {"id": entity_id}
+        assert [v["id"] for v in store.values()] == ids
+        assert list(store) == ids
+
+    def test_entities_spread_across_shards(self):
+        """Prueba que las entidades se repartan entre los shards"""
+        store = ShardedStore(num_shards=4)
+        for _ in range(400):
+            store[new_id()] = {}
+        assert all(len(shard.data) > 0 for shard in store.shards)
+
+    def test_locked_is_deadlock_free(self):
+        """Prueba que bloquear claves en órdenes opuestos no produzca deadlock"""
+        store = ShardedStore(num_shards=8)
+        keys = [new_id() for _ in range(8)]
+        a, b = keys[0], next(k for k in keys if store.shard_index(k) != store.shard_index(keys[0]))
+
+        def worker(first, second):
+            for _ in range(500):
+                with store.locked(first, second):
+                    pass
+
+        threads = [threading.Thread(target=worker, args=(a, b)), threading.Thread(target=worker, args=(b, a))]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(timeout=10)
+        assert not any(t.is_alive() for t in threads)
+
+    def test_invalid_shard_count(self):
+        """Prueba un número de shards inválido"""
+        with pytest.raises(ValueError):
+            ShardedStore(num_shards=0)
+
+
+class TestConcurrentSales:
+    """Pruebas de concurrencia sobre las ventas"""
+
+    def test_concurrent_sales_never_oversell(self, setup_test_data):
+        """Prueba que ventas concurrentes no vendan más que el stock disponible"""
+        from fastapi import HTTPException
+        from app.routes import SaleIn, create_sale, products
+
+        product_id = setup_test_data["product_id"]
+        sale = SaleIn(client_id=setup_test_data["client_id"], product_id=product_id, quantity=1)
+        results = []
+
+        def buy():
+            try:
+                create_sale(sale)
+                results.append(True)
+            except HTTPException:
+                results.append(False)
+
+        threads = [threading.Thread(target=buy) for _ in range(20)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert results.count(True) == 5
+        assert products[product_id]["stock"] == 0
+
+    def test_concurrent_sales_publish_stock_in_order(self, client, setup_test_data):
+        """Prueba que los eventos de stock de ventas concurrentes salgan en orden"""
+        import asyncio
+        from app.events import broker
+        from app.routes import SaleIn, create_sale
+
+        product_id = setup_test_data["product_id"]
+        client.put(f"/products/{product_id}", json={"stock": 1000})
+        sale = SaleIn(client_id=setup_test_data["client_id"], product_id=product_id, quantity=1)
+
+        async def scenario():
+            sub = broker.subscribe(["stock"], max_buffer=1000)
+            # Cambios de hilo muy frecuentes para que se intercalen las ventas
+            interval = sys.getswitchinterval()
+            sys.setswitchinterval(1e-6)
+            try:
+                threads = [threading.Thread(target=lambda: [create_sale(sale) for _ in range(50)]) for _ in range(16)]
+                for t in threads:
+                    t.start()
+                for t in threads:
+                    t.join()
+                await asyncio.sleep(0)
+                return [json.loads(p.split(b"data: ")[1]) for p in sub.buffer]
+            finally:
+                sys.setswitchinterval(interval)
+                broker.unsubscribe(sub)
+
+        stock = [event["stock"] for event in asyncio.run(scenario())]
+        assert stock == list(range(999, 199, -1))
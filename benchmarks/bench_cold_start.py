@@ -0,0 +1,84 @@
+"""Benchmark de arranque en frío de la API.
+
+Lanza ``uvicorn app:app`` en un subproceso, mide el tiempo hasta que el puerto
+acepta conexiones y la latencia de los primeros requests (``/health`` incluido),
+con y sin la fase de warm-up (``STORE_API_WARMUP``). La espera se hace con un
+connect TCP para no gastar el primer request HTTP antes de medir.
+
+Uso:
+    python benchmarks/bench_cold_start.py [repeticiones]
+"""
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PORT = 8765
+FIRST_REQUESTS = [
+    ("GET", "/health", None),
+    ("GET", "/clients", None),
+    ("POST", "/clients", {"name": "Cold Start"}),
+    ("GET", "/products", None),
+    ("POST", "/products", {"name": "Cold Start", "price": 1.0, "stock": 1}),
+    ("GET", "/metrics", None),
+]
+
+
+def wait_until_listening(timeout=30.0):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", PORT), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.005)
+    raise RuntimeError("El servidor no respondió a tiempo")
+
+
+def run_once(warmup):
+    env = dict(os.environ, STORE_API_WARMUP="1" if warmup else "0")
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--port", str(PORT), "--log-level", "warning"],
+        cwd=ROOT, env=env,
+    )
+    try:
+        wait_until_listening()
+        ready = time.perf_counter() - started
+        with httpx.Client(base_url=f"http://127.0.0.1:{PORT}") as client:
+            latencies = []
+            for method, path, body in FIRST_REQUESTS:
+                t0 = time.perf_counter()
+                client.request(method, path, json=body)
+                latencies.append(time.perf_counter() - t0)
+            startup = next(
+                float(line.split()[1])
+                for line in client.get("/metrics").text.splitlines()
+                if line.startswith("app_startup_seconds ")
+            )
+        return ready, startup, latencies
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    for warmup in (False, True):
+        runs = [run_once(warmup) for _ in range(repeats)]
+        ready = statistics.median(r[0] for r in runs) * 1000
+        startup = statistics.median(r[1] for r in runs) * 1000
+        first = [statistics.median(r[2][i] for r in runs) * 1000 for i in range(len(FIRST_REQUESTS))]
+        print(f"warm-up={'on ' if warmup else 'off'}  spawn->listo {ready:7.1f} ms  "
+              f"import->listo (métrica) {startup:6.1f} ms")
+        for (method, path, _), ms in zip(FIRST_REQUESTS, first):
+            print(f"    primer {method:<4} {path:<10} {ms:6.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Benchmark de generación de IDs e interning sobre un dataset de ventas.
+
+Compara el esquema original (``str(uuid4())`` y strings de ID repetidos en cada
+venta) con ``app.ids`` (IDs monótonos + interning).
+
+Uso:
+    python benchmarks/bench_ids.py [num_ventas] [num_clientes] [num_productos]
+"""
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from uuid import uuid4
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.ids import IdInterner, new_id  # noqa: E402
+
+
+def bench_generation(n):
+    results = {}
+    for name, fn in (("uuid4", lambda: str(uuid4())), ("new_id", new_id)):
+        start = time.perf_counter()
+        for _ in range(n):
+            fn()
+        results[name] = (time.perf_counter() - start) / n * 1e9
+    return results
+
+
+def build_sales(num_sales, client_ids, product_ids, make_id, canonical):
+    """Simular create_sale: cada venta recibe los IDs como strings nuevos (JSON parseado)"""
+    sales = []
+    nc, np_ = len(client_ids), len(product_ids)
+    now = datetime.now()
+    for i in range(num_sales):
+        # json.loads produce un string nuevo en cada request, como FastAPI
+        client_id = json.loads(f'"{client_ids[i % nc]}"')
+        product_id = json.loads(f'"{product_ids[i % np_]}"')
+        sales.append({
+            "id": make_id(),
+            "client_id": canonical(client_id),
+            "product_id": canonical(product_id),
+            "quantity": 1,
+            "total_amount": 1.0,
+            "created_at": now,
+        })
+    return sales
+
+
+def measure(label, num_sales, client_ids, product_ids, make_id, canonical):
+    # Tiempo y memoria en pasadas separadas: tracemalloc encarece cada asignación
+    gc.collect()
+    start = time.perf_counter()
+    sales = build_sales(num_sales, client_ids, product_ids, make_id, canonical)
+    elapsed = time.perf_counter() - start
+    del sales
+
+    gc.collect()
+    tracemalloc.start()
+    sales = build_sales(num_sales, client_ids, product_ids, make_id, canonical)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del sales
+    print(f"{label:<22} {current / 1024 / 1024:>10.1f} MiB {elapsed / num_sales * 1e6:>10.2f} us/venta")
+    return current
+
+
+def main():
+    num_sales = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    num_clients = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+    num_products = int(sys.argv[3]) if len(sys.argv) > 3 else 1_000
+
+    print("Generación de IDs (ns/id):")
+    for name, ns in bench_generation(200_000).items():
+        print(f"  {name:<8} {ns:>8.0f}")
+
+    print(f"\nDataset: {num_sales} ventas, {num_clients} clientes, {num_products} productos")
+    client_ids = [new_id() for _ in range(num_clients)]
+    product_ids = [new_id() for _ in range(num_products)]
+
+    baseline = measure("uuid4 sin interning", num_sales, client_ids, product_ids,
+                       lambda: str(uuid4()), lambda s: s)
+    interner = IdInterner()
+    for entity_id in client_ids + product_ids:
+        interner.intern(entity_id)
+    optimized = measure("new_id + interning", num_sales, client_ids, product_ids,
+                        new_id, interner.intern)
+    print(f"\nAhorro de memoria: {(baseline - optimized) / 1024 / 1024:.1f} MiB "
+          f"({(1 - optimized / baseline) * 100:.0f}%)")
+
+
+if __name__ == "__main__":
+    main()
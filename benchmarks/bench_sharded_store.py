@@ -0,0 +1,93 @@
+"""Benchmark de escalado del store particionado frente a un lock global.
+
+Cada hilo ejecuta operaciones tipo create_sale (bloquear cliente y producto,
+leer precio, descontar stock) sobre entidades aleatorias. Con el GIL de
+CPython el escalado está limitado; en builds free-threaded (3.13t) la
+diferencia entre un lock global y N shards es la que importa.
+
+Uso:
+    python benchmarks/bench_sharded_store.py [max_hilos] [ops_por_hilo] [shards]
+"""
+import os
+import random
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.ids import new_id  # noqa: E402
+from app.store import ShardedStore  # noqa: E402
+
+NUM_CLIENTS = 10_000
+NUM_PRODUCTS = 1_000
+
+
+class GlobalLockStore(dict):
+    """Referencia: un único lock para todo el store"""
+
+    def __init__(self):
+        super().__init__()
+        self.lock = threading.RLock()
+
+    @contextmanager
+    def locked(self, *keys):
+        with self.lock:
+            yield
+
+
+def populate(clients, products):
+    client_ids = [new_id() for _ in range(NUM_CLIENTS)]
+    product_ids = [new_id() for _ in range(NUM_PRODUCTS)]
+    for cid in client_ids:
+        clients[cid] = {"id": cid, "sales": 0}
+    for pid in product_ids:
+        products[pid] = {"id": pid, "price": 1.0, "stock": 10**9}
+    return client_ids, product_ids
+
+
+def worker(clients, products, client_ids, product_ids, ops, seed):
+    rng = random.Random(seed)
+    for _ in range(ops):
+        cid = rng.choice(client_ids)
+        pid = rng.choice(product_ids)
+        with clients.locked(cid), products.locked(pid):
+            product = products[pid]
+            if product["stock"] > 0:
+                product["stock"] -= 1
+                clients[cid]["sales"] += 1
+
+
+def run(make_store, threads, ops):
+    clients, products = make_store(), make_store()
+    client_ids, product_ids = populate(clients, products)
+    pool = [
+        threading.Thread(target=worker, args=(clients, products, client_ids, product_ids, ops, i))
+        for i in range(threads)
+    ]
+    start = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    return threads * ops / (time.perf_counter() - start)
+
+
+def main():
+    max_threads = int(sys.argv[1]) if len(sys.argv) > 1 else os.cpu_count() or 4
+    ops = int(sys.argv[2]) if len(sys.argv) > 2 else 20_000
+    shards = int(sys.argv[3]) if len(sys.argv) > 3 else 16
+    gil = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print(f"Python {sys.version.split()[0]}  GIL={'on' if gil else 'off'}  shards={shards}")
+    print(f"{'hilos':>5} {'lock global ops/s':>18} {'sharded ops/s':>14} {'ratio':>6}")
+    threads = 1
+    while threads <= max_threads:
+        base = run(GlobalLockStore, threads, ops)
+        sharded = run(lambda: ShardedStore(shards), threads, ops)
+        print(f"{threads:>5} {base:>18,.0f} {sharded:>14,.0f} {sharded / base:>6.2f}")
+        threads *= 2
+
+
+if __name__ == "__main__":
+    main()